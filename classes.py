@@ -1,4 +1,8 @@
+import bisect
 import random
+import threading
+import time
+from collections import OrderedDict
 from typing import Self
 import PySimpleGUI as sg
 import numpy as np
@@ -14,8 +18,8 @@ A `Convolution` is an object that has a convoluted distribution graph with each
 their own individual `Bar` objects.  This is the theoretical probability distribution for rolling the `n` dice.
 
 The `Simulation` class controls the entire simulation. It is invoked as an object by the `EventHandler` and the step is 
-incremented there.  The simulation creates `Roll` objects and draws them on the graph.  
-Each `Roll` is remembered by the `simulation` and, when selected, will display the outcome of each die rolled.
+incremented there.  The simulation stores its rolls in a `RollStore` and draws them on the graph through `Roll` views.  
+Each roll is remembered by the store and, when selected, its `Roll` view will display the outcome of each die rolled.
 
 Note: A `Simulation` requires a `Mainframe` and information about the `Convolution` to be instantiated, so it 
     can only be created AFTER the Mainframe has been fully instantiated. Whereas the `mainframe` instantiates 
@@ -51,11 +55,30 @@ class EventHandler:
         self.logging = False
         self.full_logging = False
 
+        # Slider event coalescing. A drag emits a burst of face events; the sliders and the mean/deviation text follow every
+        #   event, but the convolution is only rebuilt once no face event has arrived for `coalesce_window` seconds.
+        self.coalesce_window: float = 0.030
+        self.last_slider_event: float = None  # time of the latest face event in an unfinished burst, None if there is no burst
+        self.coalesced_events: int = 0        # face events whose convolution rebuild was absorbed by a later event
+        self.processed_events: int = 0        # convolution rebuilds done at the end of a burst
+
 
     def error_popup(self, error, message, duration=5) -> None:
         sg.popup_quick_message(f'\n{error}\n\n{message}\n', background_color='#1b1b1b', text_color='#fafafa', auto_close_duration=duration, grab_anywhere=True, keep_on_top=False)
 
 
+    def flush_slider_burst(self, force=False) -> None:
+        """
+        Rebuilds the convolution if a burst of slider events has settled, or right away if `force` is True.
+        """
+        if self.last_slider_event is None:
+            return
+        if force or time.perf_counter() - self.last_slider_event >= self.coalesce_window:
+            self.last_slider_event = None
+            self.processed_events += 1
+            self.mf.update_convolution()
+
+
     def handle(self, event) -> bool:
         """
         Handles the event from Window.read()
@@ -74,6 +97,8 @@ class EventHandler:
             up, down, dice - change the number of dice to throw
             go - start the simulation
             Pause - pause/play the simulation
+            max speed - only animate the last roll of each frame of the simulation
+            convolution ready - the ConvolutionWorker finished a convolution, draw it if it is still the newest one
             convolution graph - clicked the convolution graph, activate hit detection/outcome
             simulation graph - clicked the simulation graph, activate hit detection/outcome
         """
@@ -94,6 +119,8 @@ class EventHandler:
                         print(f'\'{key}\' : {mf.values[key]},')
         if event in (None, 'exit', sg.WINDOW_CLOSED):
             print("[LOG] Clicked Exit!")
+            if mf.convolution_worker:
+                mf.convolution_worker.stop()
             mf.window.close()
             return False
 
@@ -104,15 +131,15 @@ class EventHandler:
                 key = event[0]
                 image_tag = event[0][1]
                 if event[1] == 'ENTER':
-                    image_b64_data = getattr(mf.images, image_tag + '_hover')
-                    mf.window[key].update(data=image_b64_data)
+                    mf.set_hover_image(key, image_tag + '_hover')
                 if event[1] == 'EXIT':
-                    image_b64_data = getattr(mf.images, image_tag)
-                    mf.window[key].update(data=image_b64_data)
+                    mf.set_hover_image(key, image_tag)
             else:  # Image clicked
                 button_clicked = event[1]
                 if button_clicked == 'exit':
                     print("[LOG] Clicked Exit!")
+                    if mf.convolution_worker:
+                        mf.convolution_worker.stop()
                     mf.window.close()
                     return False
                 elif button_clicked == 'menubar_CLT':
@@ -139,9 +166,17 @@ class EventHandler:
         elif event == 'Clear':
             mf.window['log'].update(value='')
 
+        elif event == 'convolution ready':
+            mf.finish_convolution(mf.values[event])
+
         elif event.startswith('face'):
-            mf.activate_slider(event=event)
+            mf.activate_slider(event=event, rebuild_convolution=False)
+            if mf.convolution_engine.use_normal(mf.dice):  # too many dice to wait for, follow the drag with the approximation
+                mf.update_convolution(approximate=True)
             mf.window['rolls'].set_focus()
+            if self.last_slider_event is not None:
+                self.coalesced_events += 1
+            self.last_slider_event = time.perf_counter()
 
         elif event.startswith('lock'):
             active_lock = int(event[-1])
@@ -180,12 +215,19 @@ class EventHandler:
             try:
                 if int(mf.values['dice']):
                     # Run the simulation
+                    self.flush_slider_burst(force=True)
+                    mf.current_convolution()
                     mf.simulate = True
                     mf.sim = Simulation(mf)
+                    if mf.sim.instant:
+                        mf.sim.roll_all()
             except ValueError as ve:
                 mf.simulate = False
                 self.error_popup(error='Value Error', message=ve)
         
+        elif event == 'max speed':
+            mf.scheduler.max_speed = mf.values[event]
+
         elif event == 'Pause' and mf.sim:
             mf.simulate = not mf.simulate
             new_text = 'Pause' if mf.simulate else "Play"
@@ -196,7 +238,7 @@ class EventHandler:
                 hit_bin: Bar = None
                 mf.convolution.selection_box_id, hit_bin = mf.activate_hit_detect(
                     click=mf.values[event], graph=mf.con_graph, event=event,
-                    objects=mf.convolution.bins, prev_selection=(mf.convolution.selection_box_id, None),
+                    objects=mf.convolution.bar_index, prev_selection=(mf.convolution.selection_box_id, None),
                     offset=(0, 15)
                 )
             except TypeError:
@@ -215,22 +257,28 @@ class EventHandler:
                 mf.sim.displaying_roll = False
                 mf.sim.delete_ids()
 
+
+        # rebuild the convolution once the slider burst has settled
+        self.flush_slider_burst()
+
+        # keep boxes for the rolls in view of the simulation graph only
+        if mf.sim:
+            mf.sim.viewport.refresh()
         
         ######################################
         # Animation
         ######################################
         if mf.simulate:
             if mf.sim.trial_number <= mf.sim.number_of_rolls:
-                mf.sim.roll_dice(mf.sim.trial_number)
-                mf.sim.trial_number += 1
+                mf.scheduler.run(mf.sim)
             else:
                 mf.simulate = False
                 max_bin = None
                 max_length = 0
-                for bin, outcomes in mf.sim.bin_dictionary.items():
-                    if len(outcomes) > max_length:
+                for bin, occurrences in mf.sim.outcome_counter.items():
+                    if occurrences > max_length:
                         max_bin = bin
-                        max_length = len(outcomes)
+                        max_length = occurrences
                 self.error_popup(error='Finished!', message=f'The sum with the most outcomes was {max_bin},\nwhich was rolled {max_length} times.', duration=4)
 
         return True  # tells the event loop to run again
@@ -285,6 +333,36 @@ class ImageData:
         self.minimize_hover = b'iVBORw0KGgoAAAANSUhEUgAAACYAAAATCAYAAAD8in+wAAAACXBIWXMAAA7DAAAOwwHHb6hkAAAAGXRFWHRTb2Z0d2FyZQB3d3cuaW5rc2NhcGUub3Jnm+48GgAAAMNJREFUSIntljEKxCAQRb9hO0Eh2qTJDXIKr+KxvEpOYmcTEGwE62y3rJEFkwXXhbzyMzgPGYYhAHZ0yOMYcM4xjmNTCe89UkpZlolJKWGtBaW0qViMEcuyYNu2Vza8F8zz3FwKABhjmKYpy4YPtT/nFjtLt2LFuqhl3+vWHyHk0vuXxLTWWNe1qlYpBWPM6R6XxIwxff7YNw1r6Xb4b7Gz/IeYc644P1qQUoJzLssIDociYwxCiJZeCCEgxphlhVgvPAFHfjH+GTQ4cAAAAABJRU5ErkJggg=='
         self.exit_hover = b'iVBORw0KGgoAAAANSUhEUgAAACYAAAATCAYAAAD8in+wAAAACXBIWXMAAA7DAAAOwwHHb6hkAAAAGXRFWHRTb2Z0d2FyZQB3d3cuaW5rc2NhcGUub3Jnm+48GgAAAZhJREFUSIndlk1LAlEUhp+5CqOTBcrURqhf0KpVuIkwgpCohSDRB/QLot8Qrlq0LggsaFNgIASZuAuXQRG4aRUuKkkCGx3UmRZROGOhDTSF7+6e+97Dwz2Hc68EmPxDee2BQQRBPK5ClGmi2e7HAhbCQ4FRFCRXwaoYTHHPA63PmGg3hPG6DgUQQDBiK574xvvn6i8wKaD8irddjsCCu0nUbAolEUPyyZ0wPhklEUPNpgjuJh2BSbTNsXFkzgh3PyUE8vQkA6uLyNEI9Uwe7TCNUXlBWVlEWV6gcXXL60GaWvocmq2uKecocYP+ue6YYz3JMNBzl+i5S7xjYYa2NlHPU+AR6PkCT9EVmsU7R6k/5Kz5hUCORggdbDNcOMHU6pRn13icmKdxXWQ4d4ia2cMfnwOvs2HtqJShox2EGkTbP6Z2eoFZ1y37kk/GvzCDsh7HKFd4XtromtNeSkdgUkDBrGpdfT/x2sEclbJXqJ9629VfA9YNWcBKX3w/3JCGSYmmJWZpfnh/6UMu/8eeaVHFsMQ6wP6L3gCof32hmi+c+gAAAABJRU5ErkJggg=='
 
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Image Cache
+#
+# - The `image data` decoded into tk.PhotoImage objects, once per image for the whole process.
+# ----------------------------------------------------------------------------------------------------------------------
+class ImageCache:
+    photos: dict = {}  # Image name -> tk.PhotoImage, shared by every cache in the process.
+
+    def __init__(self, images: ImageData):
+        """
+        Decodes an image the first time it is asked for.  Tk needs a root to decode into, so nothing can be asked for 
+        before the window exists.
+        :param images: Type - ImageData: Where the base64 data of the images is found.
+        """
+        self.images: ImageData = images
+
+
+    def get(self, name: str):
+        """
+        :param name: Type - str: The name of the image's attribute in `ImageData`, i.e. 'die3' or 'author_hover'.
+        :return: Type - tk.PhotoImage: The decoded image.
+        """
+        photo = ImageCache.photos.get(name)
+        if photo is None:
+            photo = sg.tk.PhotoImage(data=getattr(self.images, name))
+            ImageCache.photos[name] = photo
+        return photo
+
+
 class Mainframe:
     def __init__(self):
         """
@@ -298,6 +376,7 @@ class Mainframe:
         
         # Self
         self.images = ImageData()
+        self.image_cache = ImageCache(self.images)
 
         # Initialize the maestro, an EventHandler
         self.maestro: EventHandler = None
@@ -315,8 +394,17 @@ class Mainframe:
 
         # Controlling variables
         self.update_interval: int = 64        # Controls framerate / speed of simulation
+        self.scheduler = RollScheduler()      # Runs the simulation's rolls in frames of a fixed time budget
         self.simulate: bool = False           # Turns the simulation on or off (pause/play)
         self.matching_graphs: bool = False    # If the graphs match, we can select and compare columns between sim. and conv.
+        self.sampling_mode: str = 'auto'      # How the simulation rolls: 'faces', 'counts', 'sums', or 'auto' (see DiceSampler)
+        self.multinomial_threshold: int = 500 # Dice per roll from which 'auto' draws face counts instead of each die
+        self.normal_threshold: int = 1000     # Dice from which dragging a slider draws the normal approximation until the drag settles
+        self.instant_threshold: int = 50_000  # Simulations of at least this many rolls are rolled all at once, then drawn in one pass
+        self.max_roll_items: int = 20_000     # Most boxes the simulation graph draws, one per roll. Past it, each column is one bar
+        self.tail_mass: float = 1e-12         # Convolutions leave out outcomes holding this much probability in all. None computes them all
+        self.tail_threshold: int = 200        # Dice from which the tail cutoff is used
+        self.log_space: bool = False          # Convolutions are computed, scaled and trimmed as log probabilities, which do not underflow
 
         # Graph dimensions and margins
         # Simulation graph
@@ -341,12 +429,37 @@ class Mainframe:
 
         # Initialize Convolution
         self.convolution_title = f' The Probability Distribution for the Sum of {self.dice} Dice '
+        self.convolution_engine = ConvolutionEngine(       # Lives on the frame so it outlives each Convolution
+            tail_mass=self.tail_mass, tail_threshold=self.tail_threshold, log_space=self.log_space,
+            normal_threshold=self.normal_threshold)
+        self.convolution_scene = ConvolutionScene()        # Same, keeps the canvas items of the convolution graph
+        self.convolution_worker: ConvolutionWorker = None  # Gets initialized by make_window.py, computes convolutions off the GUI thread
         self.convolution: Convolution = Convolution(self)  # Requires a frame as a parameter
         self.convolution_display_ids: list = []            # Figure ID's for the figures of the bar display method on the convolution graph
 
         print(f'Complete!\n')
 
     
+    def read_timeout(self) -> int:
+        """
+        Milliseconds for window.read() to wait for an event.  While simulating, the frame budget spent rolling is
+        taken out of the frame, so a frame still lasts about 1000 // update_interval ms.
+        """
+        frame_time = 1000 // self.update_interval
+        if self.simulate:
+            return max(1, frame_time - int(self.scheduler.frame_budget * 1000))
+        return frame_time
+
+
+    @staticmethod
+    def set_coords(graph: sg.Graph, figure: int, *points: tuple) -> None:
+        """
+        Moves a figure drawn on `graph` to new points, given in graph coordinates, without drawing a new one.
+        Two corners for a rectangle, two ends for a line, one location for text.
+        """
+        graph.Widget.coords(figure, *[coord for point in points for coord in graph._convert_xy_to_canvas_xy(*point)])
+
+
     def resize_graphs(self):
         """
         The graphs do not actually get resized.  When initialized, the graph has a width and view height that fill the available screen size. 
@@ -435,6 +548,8 @@ class Mainframe:
         :param graph: Type - PySimpleGUI.Graph: Required to know which graph to draw the selection box
         :param event: Type - str: Name of the graph. Used to check for bin selection of the Sim. graph
         :param objects: Type - list[object]: List of objects to search through. Either Roll or Bar objects.
+                                             A simulation's RollStore is searched by its grid index, and an IntervalIndex
+                                             by x-interval, instead of one by one.
         :param prev_selection: Type - tuple[int, object]: The ID of the previous selection box and the previously selected object.
                                                           - Only the ID is actually used atm.
         :param offset: Type - tuple: Horizontal and vertical offset for hit detection search. Given as parameters to Object.is_hit(...) method
@@ -461,6 +576,11 @@ class Mainframe:
 
         # only search for objects if the click is in the graphing region
         elif click[0] > 0 and click[1] > 0:  
+            if isinstance(objects, RollStore):  # the rolls sit on a grid, look up the one under the click instead of scanning
+                hit_roll = objects.sim.roll_at(click)
+                objects = [hit_roll] if hit_roll is not None else []
+            elif isinstance(objects, IntervalIndex):  # only the objects in the click's x-range are candidates
+                objects = objects.query(click, xoffset=offset[0], yoffset=offset[1])
             for Object in objects:
                 if not found:
                     if Object.is_hit(click, xoffset=offset[0], yoffset=offset[1]):
@@ -487,14 +607,39 @@ class Mainframe:
         self.locked_values[active_lock - 1] = self.values[f'face{active_lock}']
         self.locks[active_lock - 1] = not self.locks[active_lock - 1]
         if self.locks[active_lock - 1]:
-            b64_image_data = getattr(self.images, f'lock{active_lock}')
-            self.window[f'lock{active_lock}'].update(image_data=b64_image_data)
+            self.set_lock_image(active_lock, f'lock{active_lock}')
         else:
-            b64_image_data = getattr(self.images, f'die{active_lock}')
-            self.window[f'lock{active_lock}'].update(image_data=b64_image_data)
+            self.set_lock_image(active_lock, f'die{active_lock}')
             self.locked_values[active_lock - 1] = 0
 
 
+    def set_lock_image(self, lock: int, name: str):
+        """
+        Puts one of the cached images on a lock button.  `Button.update(image_data=...)` would decode it again.
+        :param lock: Type - int: The die face of the lock button.
+        :param name: Type - str: The name of the image in `ImageData`.
+        """
+        button = self.window[f'lock{lock}']
+        if button.UseTtkButtons:  # the image lives in a ttk style, leave it to PySimpleGUI
+            button.update(image_data=getattr(self.images, name))
+            return
+        photo = self.image_cache.get(name)
+        button.TKButton.config(image=photo)
+        button.TKButton.image = photo
+
+
+    def set_hover_image(self, key: tuple, name: str):
+        """
+        Puts one of the cached images on a hover image.  `Image.update(data=...)` would try to decode it first.
+        :param key: Type - tuple: The key of the sg.Image element.
+        :param name: Type - str: The name of the image in `ImageData`.
+        """
+        label = self.window[key].tktext_label
+        photo = self.image_cache.get(name)
+        label.configure(image=photo)
+        label.image = photo
+
+
     def set_sliders_to(self, slider_values, reset_locks=False):
         """
         Used to set all sliders to pre-decided values. Used by 'Randomize' event and `set_preset`
@@ -505,20 +650,21 @@ class Mainframe:
             if self.locks[i - 1] and reset_locks is True:  # Reset locks
                 self.locks[i - 1] = False
                 self.locked_values[i - 1] = 0
-                b64_image_data = getattr(self.images, f'die{i}')
-                self.window[f'lock{i}'].update(image_data=b64_image_data)
+                self.set_lock_image(i, f'die{i}')
             self.values[f'face{i}'] = slider_values[i - 1]
             self.window[f'face{i}'].update(self.values[f'face{i}'])
 
         self.die_distribution = slider_values
         self.mean_and_deviation(slider_values)
-        self.convolution = Convolution(self)
+        self.update_convolution()
 
 
-    def activate_slider(self, event, active_face=None, set_to_value=None):
+    def activate_slider(self, event, active_face=None, set_to_value=None, rebuild_convolution=True):
         """
         Moving one slider means moving all the other sliders as well. 
         This function facilitates that. 
+        :param rebuild_convolution: Type - bool: If False, only the sliders and the mean/deviation are updated; the caller
+                                                 is responsible for calling `update_convolution` later.
         """
         if set_to_value is None:
             set_to_value = self.values[event]
@@ -589,7 +735,8 @@ class Mainframe:
             # Finished moving, update related objects.
             self.mean_and_deviation(slider_values)
             self.die_distribution = [_ for _ in slider_values]
-            self.convolution = Convolution(self)
+            if rebuild_convolution:
+                self.update_convolution()
             self.window['preset'].update(value='')
 
         else:  # Slider is locked, keep value constant
@@ -597,6 +744,45 @@ class Mainframe:
             self.window[event].update(self.values[event])
 
 
+    def update_convolution(self, approximate=False):
+        """
+        Rebuilds the convolution for the current die distribution and number of dice.  Once the window exists the work is
+        handed to the `ConvolutionWorker`, and the result is drawn by `finish_convolution` when its event arrives.
+        :param approximate: Type - bool: Draw the normal approximation right away instead, while a slider is dragged.  Any
+                                         exact result still being computed is dropped; the exact convolution is requested
+                                         again once the drag settles.
+        """
+        if approximate:
+            if self.convolution_worker is not None:
+                self.convolution_worker.cancel()
+            self.convolution = Convolution(self, approximate=True)
+        elif self.convolution_worker is None:
+            self.convolution = Convolution(self)
+        else:
+            self.convolution_worker.request(self.die_distribution, self.dice)
+
+
+    def finish_convolution(self, result: tuple):
+        """
+        Draws a convolution computed by the `ConvolutionWorker`, unless a newer one has been requested since.
+        :param result: Type - tuple: (request ID, result of ConvolutionEngine.convolve)
+        """
+        request_id, computed = result
+        if self.convolution_worker.finish(request_id):
+            self.convolution = Convolution(self, computed=computed)
+
+
+    def current_convolution(self):
+        """
+        Ensures the convolution matches the die distribution and number of dice, computing it now if the worker has not
+        finished yet.  Used before the simulation copies the convolution.
+        """
+        if self.convolution_worker is not None and self.convolution_worker.busy():
+            self.convolution_worker.cancel()
+            self.convolution = Convolution(self)
+        return self.convolution
+
+
     def dice_change(self, value=None):
         """
         Method to keep track of the amount of dice entered. Only allows positive integers to be entered.
@@ -612,7 +798,7 @@ class Mainframe:
             self.dice = value if value > 0 else 1
             self.window['dice'].update(value=self.dice)
             self.window['dist tab'].update(title=f' The Probability Distribution for the Sum of {self.dice} Dice ')
-            self.convolution = Convolution(self)
+            self.update_convolution()
         except ValueError:
             raise ValueError('The number of dice must be a non-negative integer.')
         except Exception:
@@ -620,6 +806,714 @@ class Mainframe:
             print(self.dice)
 
 
+# ----------------------------------------------------------------------------------------------------------------------
+# Convolution Cache
+#
+# - A least-recently-used store of computed distributions, used by the `convolution engine`.
+# ----------------------------------------------------------------------------------------------------------------------
+class ConvolutionCache:
+    def __init__(self, memory_budget: int = 64 * 1024 ** 2):
+        """
+        Remembers the distributions for recently seen (die distribution, number of dice) pairs, so flipping between presets
+        or stepping the number of dice up and back down does not recompute anything.
+        :param memory_budget: Type - int: The most bytes of distribution data to hold. The least recently used entries are
+                                          evicted first.
+        """
+        self.memory_budget: int = memory_budget
+        self.entries: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self.size: int = 0  # bytes currently held
+        self.hits: int = 0
+        self.misses: int = 0
+
+
+    def __repr__(self) -> str:
+        return f"ConvolutionCache: {len(self.entries)} entries, {self.size} / {self.memory_budget} bytes, {self.hits} hits, {self.misses} misses"
+
+
+    @staticmethod
+    def make_key(die_dist, n: int, *args) -> tuple:
+        """
+        Canonical key for a die. The weights are normalized to 1 and rounded, so that the same die given in percent or as
+        a probability, or with float round-off from the sliders, maps to the same entry.  Extra `args` are added to the key.
+        """
+        weights = np.asarray(die_dist, dtype=float)
+        weights = np.round(weights / weights.sum(), 12)
+        return (weights.tobytes(), int(n), *args)
+
+
+    def get(self, key: tuple) -> np.ndarray | None:
+        distribution = self.entries.get(key)
+        if distribution is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return distribution
+
+
+    def put(self, key: tuple, distribution: np.ndarray) -> None:
+        """
+        Stores a read-only view of the distribution, evicting the least recently used entries to stay within the budget.
+        """
+        if distribution.nbytes > self.memory_budget:
+            return
+        if key in self.entries:
+            self.size -= self.entries.pop(key).nbytes
+        distribution.flags.writeable = False  # the cached array is shared by every Convolution that uses it
+        self.entries[key] = distribution
+        self.size += distribution.nbytes
+        while self.size > self.memory_budget:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= evicted.nbytes
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Convolution Engine
+#
+# - Computes the distribution for the sum of `n` dice. Lives in the `mainframe` so that it outlives the `convolution`
+#   objects, which are rebuilt every time a slider or the number of dice changes.
+# ----------------------------------------------------------------------------------------------------------------------
+class ConvolutionEngine:
+    def __init__(self, method: str = 'auto', crossover: int = 8, cache: ConvolutionCache = None, ladder_size: int = 32, ladder_reach: int = 4,
+                 tail_mass: float = None, tail_threshold: int = 200, log_space: bool = False, normal_threshold: int = None):
+        """
+        Convolves a die distribution with itself `n` times.
+        :param method: Type - str: 'direct', 'fft', 'squaring', or 'auto'. 'auto' picks 'direct' below the crossover and 'fft' otherwise.
+        :param crossover: Type - int: The number of dice at which 'auto' switches from direct convolution to the FFT.
+        :param cache: Type - ConvolutionCache: Where computed distributions are remembered. Pass `False` to disable caching.
+        :param ladder_size: Type - int: The most powers of the current die to keep on the ladder. 0 disables the ladder.
+        :param ladder_reach: Type - int: The most single die steps to climb from a rung before a full computation is cheaper.
+        :param tail_mass: Type - float: If given, `sum_distribution` only computes the window of outcomes that holds all but
+                                        this much probability. None computes every outcome.
+        :param tail_threshold: Type - int: The number of dice at which the tail cutoff starts being used.
+        :param log_space: Type - bool: If True, Convolutions are computed with `log_power`, which does not underflow.
+        :param normal_threshold: Type - int: The number of dice from which `convolve(..., approximate=True)` uses
+                                             `normal_approximation` instead of an exact computation. None always computes exactly.
+        """
+        self.methods = {
+            'direct': self.direct_power,
+            'fft': self.fft_power,
+            'squaring': self.squaring_power,
+        }
+        self.method: str = method
+        self.crossover: int = crossover
+        self.cache: ConvolutionCache | None = ConvolutionCache() if cache is None else (cache or None)
+
+        # The ladder holds the powers of the most recent die, {number of dice: distribution}.  Stepping the number of dice
+        #   up from a rung costs one convolution with the die.  A count computed with the FFT also puts the `ladder_reach`
+        #   counts below it on the ladder, so stepping down lands on a rung that is already computed.
+        self.ladder: dict[int, np.ndarray] = {}
+        self.ladder_die: bytes = None  # canonical weights of the die the ladder was built for
+        self.ladder_count: int = None  # number of dice of the latest Convolution, the rungs furthest from it are dropped first
+        self.ladder_size: int = ladder_size
+        self.ladder_reach: int = ladder_reach
+
+        # Analytic tail cutoff
+        self.tail_mass: float | None = tail_mass
+        self.tail_threshold: int = tail_threshold
+
+        # Log-space mode, for huge numbers of dice
+        self.log_space: bool = log_space
+
+        # Central Limit Theorem fast path
+        self.normal_threshold: int | None = normal_threshold
+
+        # The engine is shared by the GUI thread and the frame's ConvolutionWorker, its cache and ladder are not thread-safe.
+        self.lock = threading.Lock()
+
+
+    def convolve(self, die_dist, n: int, mean: float = None, deviation: float = None, approximate: bool = False) -> tuple[int, np.ndarray, np.ndarray, float]:
+        """
+        Computes everything a Convolution needs for `n` dice, using whichever mode the engine is set to.
+        Returns (index of the first outcome counted from n, distribution, log distribution or None, approximation error or None).
+        Thread-safe.
+        :param approximate: Type - bool: If True, and `n` is at least `normal_threshold`, returns the normal approximation.
+        """
+        with self.lock:
+            if approximate and self.use_normal(n):
+                distribution, error = self.normal_approximation(die_dist, n)
+                return 0, distribution, None, error
+            self.ladder_count = n
+            if self.log_space:
+                log_distribution = self.log_power(die_dist, n)
+                return 0, np.exp(log_distribution), log_distribution, None
+            # The engine may only return a window of the outcomes when its tail cutoff is on.
+            first, distribution = self.sum_distribution(die_dist, n, mean, deviation)
+            return first, distribution, None, None
+
+
+    def power(self, die_dist, n: int, method: str = None) -> np.ndarray:
+        """
+        Returns the distribution for the sum of `n` dice, indexed from the smallest possible sum.
+        Results are served from, and saved to, the cache. Cached arrays are read-only.
+        :param die_dist: Type - list[float]: The die distribution, normalized to 1.
+        :param n: Type - int: The number of dice.
+        :param method: Type - str: Overrides `self.method` for this call only.
+        """
+        die_dist = np.asarray(die_dist, dtype=float)
+        if n < 1:
+            raise ValueError('The number of dice must be a positive integer.')
+        key = ConvolutionCache.make_key(die_dist, n)
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.add_rung(key[0], n, cached)
+                return cached
+        convoluted_distribution = self.climb_ladder(key[0], die_dist, n)
+        if convoluted_distribution is None:
+            if method is None:
+                method = self.method
+            if method == 'auto':
+                method = 'direct' if n < self.crossover else 'fft'
+            if n == 1:
+                convoluted_distribution = die_dist.copy()
+            elif method == 'fft' and self.ladder_size:
+                convoluted_distribution = self.seed_ladder(key[0], die_dist, n)
+            else:
+                convoluted_distribution = self.methods[method](die_dist, n)
+        if self.cache:
+            self.cache.put(key, convoluted_distribution)
+        self.add_rung(key[0], n, convoluted_distribution)
+        return convoluted_distribution
+
+
+    def sum_distribution(self, die_dist, n: int, mean: float = None, deviation: float = None) -> tuple[int, np.ndarray]:
+        """
+        The distribution for the sum of `n` dice as (index of the first outcome, distribution).  The index is counted from
+        the smallest possible sum, `n`.  With the tail cutoff on, and at least `tail_threshold` dice, only the window given
+        by `tail_window` is computed.  Otherwise the whole support is computed and the index is 0.
+        :param mean: Type - float: The mean of a single die, as from Mainframe.mean_and_deviation
+        :param deviation: Type - float: The standard deviation of a single die.
+        """
+        if self.tail_mass is None or n < self.tail_threshold:
+            return 0, self.power(die_dist, n)
+        return self.windowed_power(die_dist, n, self.tail_mass, mean, deviation)
+
+
+    @staticmethod
+    def tail_window(die_dist, n: int, mass: float, mean: float = None, deviation: float = None) -> tuple[int, int]:
+        """
+        The outcomes (first, last), counted from `n`, outside of which the sum of `n` dice has less than `mass` probability.
+        The half width is the smaller of the Hoeffding bound, which only uses the range of the die, and the Bernstein
+        bound, which uses its variance:
+            Hoeffding:  P(|S - n * mean| >= t) <= 2 exp(-2 t^2 / (n * range^2))
+            Bernstein:  P(|S - n * mean| >= t) <= 2 exp(-t^2 / (2 (n * variance + c * t / 3))),  c = max|X - mean|
+        """
+        die_dist = np.asarray(die_dist, dtype=float)
+        faces = np.flatnonzero(die_dist > 0)
+        low, high = int(faces[0]), int(faces[-1])  # the smallest and largest faces that can be rolled, counted from 0
+        values = np.arange(1, len(die_dist) + 1)
+        if mean is None:
+            mean = float(np.dot(values, die_dist))
+        if deviation is None:
+            deviation = float(np.dot((values - mean) ** 2, die_dist)) ** 0.5
+        log_term = np.log(2 / mass)
+        c = max(abs(low + 1 - mean), abs(high + 1 - mean))
+        hoeffding = (n * (high - low) ** 2 * log_term / 2) ** 0.5
+        bernstein = log_term * c / 3 + ((log_term * c / 3) ** 2 + 2 * log_term * n * deviation ** 2) ** 0.5
+        half_width = min(hoeffding, bernstein)
+        center = n * (mean - 1)  # the mean sum, counted from n
+        first = max(n * low, int(np.floor(center - half_width)))
+        last = min(n * high, int(np.ceil(center + half_width)))
+        return first, last
+
+
+    def windowed_power(self, die_dist, n: int, mass: float, mean: float = None, deviation: float = None) -> tuple[int, np.ndarray]:
+        """
+        Computes only the outcomes inside `tail_window`.  The FFT is taken with a length just larger than the window
+        instead of the whole support, so the circular convolution wraps around; every outcome that wraps onto the window
+        lies outside of it, so the error this adds is less than `mass`.  Costs O(w log w) for a window of width w ~ sqrt(n).
+        """
+        die_dist = np.asarray(die_dist, dtype=float)
+        first, last = self.tail_window(die_dist, n, mass, mean, deviation)
+        width = last - first + 1
+        fft_length = max(1 << (width - 1).bit_length(), len(die_dist))
+        if fft_length >= (len(die_dist) - 1) * n + 1:  # the window is not smaller than the whole support
+            return 0, self.power(die_dist, n)
+
+        key = ConvolutionCache.make_key(die_dist, n, 'window', mass)
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return first, cached
+        convoluted_distribution = self.wrapped_power(die_dist, n, first, last)
+        if self.cache:
+            self.cache.put(key, convoluted_distribution)
+        return first, convoluted_distribution
+
+
+    @classmethod
+    def wrapped_power(cls, die_dist: np.ndarray, n: int, first: int, last: int) -> np.ndarray:
+        """
+        The outcomes `first` to `last` of the n-fold convolution, from a circular FFT just longer than the window.
+        Accurate as long as the probability outside of the window is negligible.
+        """
+        width = last - first + 1
+        fft_length = max(1 << (width - 1).bit_length(), len(die_dist))
+        transform = np.fft.rfft(die_dist, fft_length)
+        wrapped = np.fft.irfft(transform ** n, fft_length)
+        return cls.clean(wrapped[np.arange(first, last + 1) % fft_length], fft_length)
+
+
+    def log_power(self, die_dist, n: int) -> np.ndarray:
+        """
+        The natural log of the distribution for the sum of `n` dice, -inf for impossible outcomes.  Tail probabilities far
+        below the smallest float, like (0.04)^1000 for a thousand sixes, stay exact to about 10 significant figures.
+
+        Uses exponential tilting, a scaled FFT.  Tilting the die by `theta`,  q(x) = p(x) e^(theta x) / M(theta),  moves the
+        bulk of the n-fold distribution to wherever we like, and the untilted probabilities are recovered exactly from
+            log P(S = s) = log Q(S = s) + n log M(theta) - theta s.
+        Each tilt gives full precision within about one standard deviation of its centre, so `theta` is stepped from the
+        smallest sum to the largest one standard deviation at a time, which takes O(sqrt(n)) windowed FFTs.
+        """
+        die_dist = np.asarray(die_dist, dtype=float)
+        if n < 1:
+            raise ValueError('The number of dice must be a positive integer.')
+        key = ConvolutionCache.make_key(die_dist, n, 'log')
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        with np.errstate(divide='ignore'):
+            log_die = np.log(die_dist)
+        possible = np.flatnonzero(die_dist > 0)
+        low, high = int(possible[0]), int(possible[-1])  # faces counted from 0, so the sums are counted from n
+        log_distribution = np.full((len(die_dist) - 1) * n + 1, -np.inf)
+        if n == 1:
+            log_distribution = log_die
+        elif low == high:  # a die with a single possible face can only roll one sum
+            log_distribution[n * low] = n * log_die[low]
+        else:
+            best = np.zeros(len(log_distribution))  # the largest tilted probability seen so far for each sum
+            theta = self.tilt_for_mean(log_die, low + 0.5 / n)
+            last_theta = self.tilt_for_mean(log_die, high - 0.5 / n)
+            while True:
+                tilted_die, log_mgf, mean, deviation = self.tilt(log_die, theta)
+                first, last = self.tail_window(tilted_die, n, 1e-20, mean + 1, deviation)
+                tilted = self.wrapped_power(tilted_die, n, first, last)
+                # keep the tilted values that beat the other tilts; anything tiny compared to this tilt's peak is FFT noise
+                sums = np.arange(first, last + 1)
+                better = (tilted > best[first : last + 1]) & (tilted > 1e-8 * tilted.max())
+                sums = sums[better]
+                best[sums] = tilted[better]
+                log_distribution[sums] = np.log(tilted[better]) + n * log_mgf - theta * sums
+                if theta >= last_theta:
+                    break
+                theta = min(theta + 1 / (deviation * n ** 0.5), last_theta)
+
+        if self.cache:
+            self.cache.put(key, log_distribution)
+        return log_distribution
+
+
+    @staticmethod
+    def tilt(log_die: np.ndarray, theta: float) -> tuple[np.ndarray, float, float, float]:
+        """
+        Exponentially tilts a die given by its log probabilities.
+        Returns the tilted die, log M(theta), and the mean and standard deviation of the tilted die (faces counted from 0).
+        """
+        faces = np.arange(len(log_die), dtype=float)
+        weights = log_die + theta * faces
+        largest = weights[np.isfinite(weights)].max()  # factored out so large |theta| cannot overflow
+        log_mgf = largest + np.log(np.exp(weights - largest).sum())
+        tilted_die = np.exp(weights - log_mgf)
+        mean = float(tilted_die @ faces)
+        deviation = float(tilted_die @ (faces - mean) ** 2) ** 0.5
+        return tilted_die, log_mgf, mean, deviation
+
+
+    @classmethod
+    def tilt_for_mean(cls, log_die: np.ndarray, mean: float) -> float:
+        """
+        Bisects for the tilt that gives the die the requested mean. The tilted mean increases with theta.
+        """
+        lower, upper = -1.0, 1.0
+        while cls.tilt(log_die, lower)[2] > mean:
+            lower *= 2
+        while cls.tilt(log_die, upper)[2] < mean:
+            upper *= 2
+        for _ in range(64):
+            middle = (lower + upper) / 2
+            if cls.tilt(log_die, middle)[2] < mean:
+                lower = middle
+            else:
+                upper = middle
+        return (lower + upper) / 2
+
+
+    def use_normal(self, n: int) -> bool:
+        return self.normal_threshold is not None and n >= self.normal_threshold
+
+
+    @staticmethod
+    def normal_approximation(die_dist, n: int) -> tuple[np.ndarray, float]:
+        """
+        Approximates the distribution for the sum of `n` dice with the CLT, Normal(n * mean, sqrt(n) * deviation), plus the
+        Edgeworth correction for the skewness (k3) and excess kurtosis (k4) of the die:
+            P(S = s) ~ h / (deviation sqrt(n)) phi(z) [1 + k3 He3(z) / (6 sqrt(n)) + k4 He4(z) / (24 n) + k3^2 He6(z) / (72 n)]
+        where z is the standardized sum, He are the Hermite polynomials, and h is the spacing of the sums that can be rolled
+        (e.g. 2 for a die with only odd faces).  O(5n) time.
+
+        Returns the distribution over the whole support and an estimate of its largest absolute error against the exact
+        engine.  The estimate adds up the largest values of the two orders the expansion leaves out, n^(-3/2) and n^(-2),
+        and max |phi_die(t)|^n away from t = 0, which catches dice that are nearly periodic (like 'Alternating') for which
+        the expansion converges slowly.
+        """
+        die_dist = np.asarray(die_dist, dtype=float)
+        faces = np.arange(len(die_dist), dtype=float)
+        possible = np.flatnonzero(die_dist > 0)
+        span = int(np.gcd.reduce(possible - possible[0])) or 1
+
+        # Standardized cumulants of a single die
+        mean = faces @ die_dist
+        central_moments = [((faces - mean) ** k) @ die_dist for k in range(7)]
+        deviation = central_moments[2] ** 0.5
+        if deviation == 0:  # a die with a single possible face can only roll one sum
+            distribution = np.zeros((len(die_dist) - 1) * n + 1)
+            distribution[n * possible[0]] = 1
+            return distribution, 0.0
+        k3 = central_moments[3] / deviation ** 3
+        k4 = central_moments[4] / deviation ** 4 - 3
+        k5 = (central_moments[5] - 10 * central_moments[3] * central_moments[2]) / deviation ** 5
+        k6 = (central_moments[6] - 15 * central_moments[4] * central_moments[2] - 10 * central_moments[3] ** 2
+              + 30 * central_moments[2] ** 3) / deviation ** 6
+
+        sums = np.arange((len(die_dist) - 1) * n + 1)
+        z = (sums - n * mean) / (deviation * n ** 0.5)
+        hermite = lambda k: np.polynomial.hermite_e.hermeval(z, [0] * k + [1])
+        density = span * np.exp(-z ** 2 / 2) / ((2 * np.pi) ** 0.5 * deviation * n ** 0.5)
+        correction = 1 + k3 * hermite(3) / (6 * n ** 0.5) + k4 * hermite(4) / (24 * n) + k3 ** 2 * hermite(6) / (72 * n)
+        distribution = density * correction
+        distribution[(sums - n * possible[0]) % span != 0] = 0  # sums off the lattice cannot be rolled
+        distribution[distribution < 0] = 0
+        distribution /= distribution.sum()
+
+        # Error estimate
+        third_order = (k5 * hermite(5) / 120 + k3 * k4 * hermite(7) / 144 + k3 ** 3 * hermite(9) / 1296) / n ** 1.5
+        fourth_order = (k6 * hermite(6) / 720 + (k4 ** 2 / 1152 + k3 * k5 / 720) * hermite(8)
+                        + k3 ** 2 * k4 * hermite(10) / 1728 + k3 ** 4 * hermite(12) / 31104) / n ** 2
+        # |phi_die(t)| on the lattice's half period, skipping the Gaussian peak around t = 0
+        t = np.linspace(8 / (deviation * n ** 0.5), np.pi / span, 512)
+        characteristic = np.abs(np.exp(1j * np.outer(t, faces)) @ die_dist)
+        error = float(np.max(np.abs(density * third_order)) + np.max(np.abs(density * fourth_order))
+                      + (np.max(characteristic) ** n if t[0] < t[-1] else 0))
+        return distribution, error
+
+
+    def add_rung(self, die: bytes, n: int, distribution: np.ndarray) -> None:
+        """
+        Puts the distribution for `n` dice on the ladder. A new die starts a new ladder, and when the ladder is full the
+        rung furthest from `ladder_count` is dropped, so the small powers `DiceSampler.faces_for_sum` asks for cannot push
+        out the rungs around the number of dice being shown.
+        """
+        if not self.ladder_size:
+            return
+        if die != self.ladder_die:
+            self.ladder = {}
+            self.ladder_die = die
+        self.ladder[n] = distribution
+        center = n if self.ladder_count is None else self.ladder_count
+        while len(self.ladder) > self.ladder_size:
+            del self.ladder[max(self.ladder, key=lambda rung: abs(rung - center))]
+
+
+    def climb_ladder(self, die: bytes, die_dist: np.ndarray, n: int) -> np.ndarray | None:
+        """
+        Finds the highest rung at or below `n` within `ladder_reach` dice and convolves it with the die one step at a time.
+        Every step is kept as a rung.  Returns None if there is no rung close enough.
+        """
+        if die != self.ladder_die:
+            return None
+        lower_rungs = [rung for rung in self.ladder if n - self.ladder_reach <= rung <= n]
+        if not lower_rungs:
+            return None
+        rung = max(lower_rungs)
+        convoluted_distribution = self.ladder[rung]
+        for dice in range(rung + 1, n + 1):
+            convoluted_distribution = np.convolve(convoluted_distribution, die_dist)
+            self.add_rung(die, dice, convoluted_distribution)
+        return convoluted_distribution
+
+
+    def seed_ladder(self, die: bytes, die_dist: np.ndarray, n: int) -> np.ndarray:
+        """
+        `fft_power` that also puts the `ladder_reach` counts below `n` on the ladder.  The die is transformed once, raised
+        to the lowest count, and multiplied by the die's transform for every step up to `n`; each rung then costs one
+        inverse FFT of the length needed for `n`.
+        """
+        lowest = max(1, n - self.ladder_reach)
+        length = (len(die_dist) - 1) * n + 1
+        fft_length = 1 << (length - 1).bit_length()
+        die_transform = np.fft.rfft(die_dist, fft_length)
+        transform = die_transform ** lowest
+        for dice in range(lowest, n + 1):
+            if dice > lowest:
+                transform = transform * die_transform
+            dice_length = (len(die_dist) - 1) * dice + 1
+            convoluted_distribution = self.clean(np.fft.irfft(transform, fft_length)[:dice_length], fft_length)
+            self.add_rung(die, dice, convoluted_distribution)
+        return convoluted_distribution
+
+
+    def direct_power(self, die_dist: np.ndarray, n: int) -> np.ndarray:
+        """
+        Convolves the die with itself one die at a time. Exact, but O(n^2) in the length of the output.
+        """
+        convoluted_distribution = die_dist
+        for _ in range(n - 1):
+            convoluted_distribution = np.convolve(convoluted_distribution, die_dist)
+        return convoluted_distribution
+
+
+    def squaring_power(self, die_dist: np.ndarray, n: int) -> np.ndarray:
+        """
+        Exponentiation by squaring. Builds d, d^2, d^4, ... and convolves together the powers that make up the binary
+        representation of `n`, so only O(log n) convolutions are needed instead of n - 1.  Exact, like `direct_power`.
+        """
+        convoluted_distribution = None
+        square = die_dist
+        while n:
+            if n & 1:
+                convoluted_distribution = square if convoluted_distribution is None else np.convolve(convoluted_distribution, square)
+            n >>= 1
+            if n:
+                square = np.convolve(square, square)
+        return convoluted_distribution
+
+
+    def fft_power(self, die_dist: np.ndarray, n: int) -> np.ndarray:
+        """
+        Transforms the die once, raises the transform to the n-th power, and transforms back once.
+        The transform is zero padded to the full length of the output, so the circular convolution does not wrap around.
+        """
+        length = (len(die_dist) - 1) * n + 1
+        fft_length = 1 << (length - 1).bit_length()  # next power of two, the fastest size for np.fft
+        transform = np.fft.rfft(die_dist, fft_length)
+        convoluted_distribution = np.fft.irfft(transform ** n, fft_length)[:length]
+        return self.clean(convoluted_distribution, fft_length)
+
+
+    @staticmethod
+    def clean(distribution: np.ndarray, fft_length: int = 1) -> np.ndarray:
+        """
+        Precision guard for the FFT. Round-off leaves noise of about `eps * fft_length` relative to the largest value,
+        some of it negative, in bins that should be exactly zero.  Clamps that noise to zero and renormalizes to 1.
+        """
+        noise_floor = np.finfo(float).eps * fft_length * distribution.max()
+        distribution[distribution < noise_floor] = 0
+        return distribution / distribution.sum()
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Convolution Worker
+#
+# - Computes convolutions on a background thread so that dragging a slider never blocks the window.
+# ----------------------------------------------------------------------------------------------------------------------
+class ConvolutionWorker:
+    def __init__(self, frame: Mainframe, event_key: str = 'convolution ready'):
+        """
+        Runs the frame's `ConvolutionEngine` on its own thread.  Only the newest request matters: a request that has not
+        started yet is replaced by the next one, and results that finish after a newer request was made are dropped.
+        Results are posted back to the event loop as (request_id, computed) with window.write_event_value(event_key, ...).
+        Requires the frame's window to exist.
+        """
+        self.f: Mainframe = frame
+        self.event_key: str = event_key
+        self.condition = threading.Condition()
+        self.pending: tuple = None     # (request_id, die distribution, number of dice) waiting for the thread
+        self.latest_id: int = 0        # ID of the newest request, anything older is stale
+        self.finished_id: int = 0      # ID of the newest request that has been drawn, or cancelled
+        self.running: bool = True
+        self.completed: int = 0        # requests computed and posted
+        self.cancelled: int = 0        # requests replaced before starting, or computed but already stale
+        self.thread = threading.Thread(target=self.run, name='convolution worker', daemon=True)
+        self.thread.start()
+
+
+    def __repr__(self) -> str:
+        return f"ConvolutionWorker: {self.completed} completed, {self.cancelled} cancelled, busy = {self.busy()}"
+
+
+    def request(self, die_distribution: list[float], dice: int) -> int:
+        """
+        Queues a convolution for the given die and number of dice, replacing any request that has not started yet.
+        Returns the ID of the request.
+        """
+        total = sum(die_distribution)
+        die_dist = [x / total for x in die_distribution]
+        with self.condition:
+            if self.pending is not None:
+                self.cancelled += 1
+            self.latest_id += 1
+            self.pending = (self.latest_id, die_dist, int(dice))
+            self.condition.notify()
+            return self.latest_id
+
+
+    def cancel(self) -> None:
+        """
+        Drops the queued request and marks the one being computed, if any, as stale.
+        """
+        with self.condition:
+            if self.pending is not None:
+                self.cancelled += 1
+                self.pending = None
+            self.latest_id += 1
+            self.finished_id = self.latest_id
+
+
+    def is_current(self, request_id: int) -> bool:
+        return request_id == self.latest_id
+
+
+    def busy(self) -> bool:
+        """
+        True if the newest request has not been drawn yet.
+        """
+        return self.finished_id != self.latest_id
+
+
+    def finish(self, request_id: int) -> bool:
+        """
+        Called from the event loop when a result arrives. Returns True if it is the newest one and should be drawn.
+        """
+        if not self.is_current(request_id):
+            return False
+        self.finished_id = request_id
+        return True
+
+
+    def stop(self) -> None:
+        with self.condition:
+            self.running = False
+            self.pending = None
+            self.condition.notify()
+
+
+    def run(self) -> None:
+        while True:
+            with self.condition:
+                while self.pending is None and self.running:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                request_id, die_dist, dice = self.pending
+                self.pending = None
+
+            mean, deviation = self.f.mean_and_deviation(die_dist, update=False)
+            computed = self.f.convolution_engine.convolve(die_dist, dice, mean, deviation)
+            if self.is_current(request_id) and self.running:
+                self.completed += 1
+                self.f.window.write_event_value(self.event_key, (request_id, computed))
+            else:
+                self.cancelled += 1
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Interval Index
+#
+# - Finds the objects under a point by their x-intervals, in O(log n). Used for the `bars` of a `convolution`.
+# ----------------------------------------------------------------------------------------------------------------------
+class IntervalIndex:
+    def __init__(self):
+        """
+        Objects with a `hitbox`, kept sorted by the left edge of their hitbox.  Built as the objects are added.
+        """
+        self.lefts: list[float] = []
+        self.rights: list[float] = []
+        self.objects: list[object] = []
+        self.widest: float = 0  # the widest interval, bounds how far left of a point an overlapping interval can start
+
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+
+    def add(self, obj) -> None:
+        (left, _), (right, _) = obj.hitbox
+        left, right = min(left, right), max(left, right)
+        i = bisect.bisect_right(self.lefts, left)  # objects added left to right, like bars, are simply appended
+        self.lefts.insert(i, left)
+        self.rights.insert(i, right)
+        self.objects.insert(i, obj)
+        self.widest = max(self.widest, right - left)
+
+
+    def query(self, point: tuple, xoffset: int = 0, yoffset: int = 0) -> list[object]:
+        """
+        The objects whose x-interval, widened by `xoffset`, contains the point, from left to right.
+        The caller checks the y extent with the object's own is_hit().
+        """
+        x = point[0]
+        first = bisect.bisect_left(self.lefts, x - xoffset - self.widest)
+        last = bisect.bisect_right(self.lefts, x + xoffset)
+        return [self.objects[i] for i in range(first, last) if self.rights[i] + xoffset >= x]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Grid Index
+#
+# - A uniform grid of equal cells holding one key each, for the rolls of a `simulation`. Point queries are O(1).
+# ----------------------------------------------------------------------------------------------------------------------
+class GridIndex:
+    def __init__(self, cell_size: tuple[float, float] = (1, 1), origin: tuple[float, float] = (0, 0), first_column: int = 0):
+        """
+        Keys, like roll indices, are filed by cell, column by column in int32 arrays that double when they fill up.
+        The cells are logical (column, row) pairs, so only the geometry, which maps points to cells, has to change when
+        the graph does; see `set_geometry`.
+        :param cell_size: Type - tuple: Width and height of a cell in graph coordinates.
+        :param origin: Type - tuple: Bottom left corner of the cell in the first column and row 0.
+        :param first_column: Type - int: The label of the leftmost column, e.g. the smallest sum.
+        """
+        self.columns: dict[int, np.ndarray] = {}  # for each column label, the key in each row, -1 for an empty cell
+        self.set_geometry(cell_size, origin, first_column)
+
+
+    def set_geometry(self, cell_size: tuple[float, float], origin: tuple[float, float] = (0, 0), first_column: int = 0) -> None:
+        self.cell_width, self.cell_height = cell_size
+        self.origin: tuple[float, float] = origin
+        self.first_column: int = first_column
+
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+
+    def add(self, column: int, rows: np.ndarray, keys: np.ndarray) -> None:
+        """
+        Files `keys` in the given rows of a column.
+        """
+        cells = self.columns.get(column)
+        top = int(rows.max()) + 1
+        if cells is None or len(cells) < top:
+            grown = np.full(max(16, top, 2 * (len(cells) if cells is not None else 0)), -1, dtype=np.int32)
+            if cells is not None:
+                grown[:len(cells)] = cells
+            cells = self.columns[column] = grown
+        cells[rows] = keys
+
+
+    def key_at(self, column: int, row: int) -> int | None:
+        cells = self.columns.get(column)
+        if cells is None or not 0 <= row < len(cells) or cells[row] < 0:
+            return None
+        return int(cells[row])
+
+
+    def cell_of(self, point: tuple) -> tuple[int, int]:
+        return (self.first_column + int((point[0] - self.origin[0]) // self.cell_width),
+                int((point[1] - self.origin[1]) // self.cell_height))
+
+
+    def query(self, point: tuple) -> int | None:
+        """
+        The key of the cell under the point, or None.
+        """
+        return self.key_at(*self.cell_of(point))
+
+
 # ----------------------------------------------------------------------------------------------------------------------
 #  .d8888b.                                      888          888    d8b                   
 # d88P  Y88b                                     888          888    Y8P                   
@@ -633,9 +1527,12 @@ class Mainframe:
 # - An object that lives in a `mainframe`. It creates a convoluted probability distribution out of `bar` objects
 # ----------------------------------------------------------------------------------------------------------------------
 class Convolution:
-    def __init__(self, frame: Mainframe):
+    def __init__(self, frame: Mainframe, computed: tuple = None, approximate: bool = False):
         """
         An object that lives in a `Mainframe`. It creates a convoluted probability distribution out of `Bar` objects
+        :param computed: Type - tuple: The result of ConvolutionEngine.convolve(...) if it was already computed, e.g. by the
+                                       frame's `ConvolutionWorker`. If None, the distribution is computed here.
+        :param approximate: Type - bool: Use the engine's normal approximation, if there are enough dice for it.
         """
         # Inheritance
         if frame.con_graph is None:  # When the frame is instantiated, the window and graph have not yet been created.
@@ -657,106 +1554,134 @@ class Convolution:
 
        # Self
         self.possible_outcomes = list(range(self.number_of_dice, (6 * self.number_of_dice) + 1))  # all possible outcomes
-        self.conv_dist = self.create_convoluted_distribution(get_var=True)
+        self.log_conv_dist: np.ndarray = None   # log probabilities, only computed when the engine is in log-space mode
+        self.approximation_error: float = None  # estimated largest error when the engine uses the normal approximation
+        self.conv_dist = self.create_convoluted_distribution(get_var=True, computed=computed, approximate=approximate)
         self.highest_point: int | float = None  # largest y-value that is allowed to draw bars on
         self.bin_width = 1
         self.scalar = 1                         # Scaling factor used to scale the pixel size of each probability
+        self.log_scalar: float = None           # log of `scalar`, used with `log_conv_dist`
+        self.trim_tolerance = 0.1               # Outcomes shorter than this many px are trimmed from the graph
         self.bins: list[Bar] = []               # list of all the bars
-        if self.graph:
-            # The make_bars() method does many things. It finds an appropriate box size, creates the drawing area, and trims the outcomes.
-            self.make_bars()  
+        self.bar_index = IntervalIndex()        # the bars by x-interval, for hit detection
 
         # Selection IDs and control
         self.current_selection = None       # The bin number of the currently selected bin
         self.selection_box_id = None        # Needs to be tracked separately so that the Simulation can delete it.
         self.selected_bar_display_ids = []  # The figures displayed on the convolution graph
+
+        if self.graph:
+            # The make_bars() method does many things. It finds an appropriate box size, trims the outcomes, and shows the bars.
+            self.make_bars()  
         
 
-    def create_convoluted_distribution(self, dice=None, get_var=False):
+    def create_convoluted_distribution(self, dice=None, get_var=False, computed=None, approximate=False):
         """
-        Uses numpy to convolve the die distribution with itself `number_of_dice` times.
+        Uses the frame's `ConvolutionEngine` to convolve the die distribution with itself `number_of_dice` times.
+        Also sets `possible_outcomes` to the outcomes the distribution covers, `log_conv_dist` in log-space mode, and
+        `approximation_error` when the normal approximation is used.
+        :param computed: Type - tuple: A result from ConvolutionEngine.convolve(...) to use instead of computing one.
         """
         if dice is None:
             dice = int(self.number_of_dice)
-        convoluted_distribution = self.die_dist
-        for _ in range(dice - 1):
-            convoluted_distribution = np.convolve(convoluted_distribution, self.die_dist)
+        if computed is None:
+            mean, deviation = self.f.mean_and_deviation(self.die_dist, update=False)
+            computed = self.f.convolution_engine.convolve(self.die_dist, dice, mean, deviation, approximate=approximate)
+        first, convoluted_distribution, self.log_conv_dist, self.approximation_error = computed
+        self.possible_outcomes = list(range(dice + first, dice + first + len(convoluted_distribution)))
         if get_var:
             return convoluted_distribution
         else: 
             self.conv_dist = convoluted_distribution
 
 
-    def trim_outcomes(self):
+    def trim_outcomes(self, tol: float = 0.1):
         """
-        Trims the list of all possible outcomes. Only allows outcomes that would use more than 0.1 px to display.
-        Searches from both left and right for the first thing that would require more than 0.1 px to display. 
+        Trims the list of all possible outcomes. Only allows outcomes that would use more than `tol` px to display.
+        The first and last outcomes above the tolerance bound the window; everything outside of it is dropped.
+        Returns the (left, right) indices of the window in the untrimmed distribution, inclusive.
+        :param tol: Type - float: The smallest bar height, in pixels, that is kept.
         """
-        feasible_outcomes = self.possible_outcomes
-        distribution = self.conv_dist
-        
-        tol = 0.1
-        found = False
-        for i, x in enumerate(distribution):
-            if not found:
-                if x * self.scalar > tol:
-                    left_border_index = i
-                    found = True
-        
-        found = False
-        for i, x in enumerate(reversed(distribution)):
-            if not found:
-                if x * self.scalar > tol:
-                    right_border_index = len(distribution) - i - 1
-                    found = True
-        
-        feasible_outcomes = feasible_outcomes[left_border_index : right_border_index + 1]
-        self.possible_outcomes = feasible_outcomes
-        self.conv_dist = distribution[left_border_index : right_border_index + 1]
-        return
+        if self.log_conv_dist is not None:
+            visible = np.flatnonzero(self.log_conv_dist + self.log_scalar > np.log(tol))
+        else:
+            visible = np.flatnonzero(np.asarray(self.conv_dist) * self.scalar > tol)
+        if visible.size == 0:  # nothing is tall enough to see, keep everything rather than nothing
+            return 0, len(self.conv_dist) - 1
+        left_border_index, right_border_index = int(visible[0]), int(visible[-1])
+
+        self.possible_outcomes = self.possible_outcomes[left_border_index : right_border_index + 1]
+        self.conv_dist = self.conv_dist[left_border_index : right_border_index + 1]
+        if self.log_conv_dist is not None:
+            self.log_conv_dist = self.log_conv_dist[left_border_index : right_border_index + 1]
+        return left_border_index, right_border_index
     
     
-    def drawing_area(self):
-        self.graph.draw_rectangle((0, 0), self.top_right)
+    def drawing_area(self) -> tuple[list[int], list[tuple[int, int]]]:
+        """
+        Draws the drawing area and the x-axis.  Returns the ids of the area and tick marks, and (id, bin index) of each
+        tick label, for the `ConvolutionScene`.
+        """
+        axis_ids = [self.graph.draw_rectangle((0, 0), self.top_right)]
+        label_ids = []
         # Draw x-axis tick marks and labels
         x_tick_label_diff = len(self.possible_outcomes) // 5  # ensures there are always 6 or fewer tick labels
         x_tick_label_diff = 1 if x_tick_label_diff < 1 else x_tick_label_diff
         for i, bin in enumerate(self.possible_outcomes):
             box_center = self.bin_width * (i + 0.5)
-            self.graph.draw_line((box_center, -1), (box_center, -5))   # box_center = self.box_width * (i + 0.5)
+            axis_ids.append(self.graph.draw_line((box_center, -1), (box_center, -5)))   # box_center = self.box_width * (i + 0.5)
             if i % x_tick_label_diff == 0:
-                self.graph.draw_text(f'{bin}', location=(box_center, -10))
+                label_ids.append((self.graph.draw_text(f'{bin}', location=(box_center, -10)), i))
+        return axis_ids, label_ids
  
     
     def find_sizes(self):
-        highest_probability = max(self.conv_dist)
         self.highest_point = self.top_right[1] - 45
-        self.scalar = self.highest_point / highest_probability
+        if self.log_conv_dist is not None:  # the tails of conv_dist may have underflowed to 0, scale in log space
+            self.log_scalar = float(np.log(self.highest_point) - np.max(self.log_conv_dist))
+            self.scalar = np.exp(self.log_scalar)
+        else:
+            highest_probability = np.max(self.conv_dist)
+            self.scalar = self.highest_point / highest_probability
         if self.number_of_dice > 14:
-            self.trim_outcomes()
+            self.trim_outcomes(tol=self.trim_tolerance)
         bins = len(self.conv_dist)
         self.bin_width = self.top_right[0] // bins
     
 
     def make_bars(self):
-        self.graph.erase()
+        # The graph is not erased, the frame's `ConvolutionScene` reuses its items. Only the selection of the previous
+        #   convolution, if any, is deleted.
+        previous = getattr(self.f, 'convolution', None)
+        for conv in {previous, self} - {None}:
+            conv.delete_ids()
+            if conv.selection_box_id:
+                conv.graph.delete_figure(conv.selection_box_id)
+                conv.selection_box_id = None
         self.bins: list[Bar] = []
+        self.bar_index = IntervalIndex()  # the old bars are gone, and so is their index
         self.graph = self.f.con_graph
         self.top_right = (self.f.con_graph_size[0] - sum(self.f.con_margins[0]), self.f.con_graph_size[1] - sum(self.f.con_margins[1]))
         # find grid points
         self.find_sizes()
-        self.drawing_area()
-        for i, x in enumerate(self.conv_dist):
+        heights = self.bar_heights()
+        for i, (x, height) in enumerate(zip(self.conv_dist, heights.tolist())):
             probability = x
-            height = x * self.scalar
             x_location = i * self.bin_width
             bin_number = i + self.possible_outcomes[0]
-            new_bar = Bar(conv=self, bin=bin_number, prob=probability, size=(self.bin_width, height), coord=x_location)
+            new_bar = Bar(conv=self, bin=bin_number, prob=probability, size=(self.bin_width, height), coord=x_location, draw=False)
             self.bins.append(new_bar)
-        tallest_bar = max(self.bins)
-        x = tallest_bar.x_coord + self.bin_width + 1
-        self.graph.draw_line((x, tallest_bar.size[1]), (self.top_right[0], tallest_bar.size[1]), color='#dcdcdc')
-        self.graph.draw_text(text=f"p = {tallest_bar.probability:.4f}", location=(self.top_right[0] - 40, tallest_bar.size[1] + 10), font='_ 11 bold')
+            self.bar_index.add(new_bar)
+        self.f.convolution_scene.show(self)  # draws, or moves, the bars, axes and guide
+
+
+    def bar_heights(self) -> np.ndarray:
+        """
+        The pixel height of every outcome, from `log_conv_dist` in log-space mode.
+        """
+        if self.log_conv_dist is not None:
+            return np.exp(self.log_conv_dist + self.log_scalar)
+        return np.asarray(self.conv_dist) * self.scalar
 
 
     def delete_ids(self, id_list=None):
@@ -771,6 +1696,92 @@ class Convolution:
         
   
 
+# ----------------------------------------------------------------------------------------------------------------------
+# Convolution Scene
+#
+# - The canvas items of the convolution graph, kept from one `convolution` to the next. Lives in the `mainframe`.
+# ----------------------------------------------------------------------------------------------------------------------
+class ConvolutionScene:
+    def __init__(self):
+        """
+        Every slider move makes a new Convolution.  Instead of erasing the graph and drawing it again, the scene keeps
+        the ids of the bars, the axes, and the max-probability guide, and moves them to fit the new distribution.
+        Bars are only added or deleted when the number of bins changes, the tick marks and labels are redrawn only
+        then, and otherwise the labels are just given their new sums.
+        """
+        self.graph: sg.Graph = None
+        self.top_right: tuple[int, int] = None
+        self.bar_ids: list[int] = []
+        self.axis_ids: list[int] = []                # the drawing area and the tick marks
+        self.label_ids: list[tuple[int, int]] = []   # (id, bin index) of each tick label
+        self.guide_id: int = None                    # the line level with the tallest bar
+        self.guide_label_id: int = None              # its `p = ...` label
+
+
+    def __repr__(self) -> str:
+        return f'ConvolutionScene: {len(self.bar_ids)} bars, {len(self.axis_ids) + len(self.label_ids)} axis items'
+
+
+    def clear(self) -> None:
+        """
+        Deletes every item of the scene, e.g. when the graph or its drawing area changes.
+        """
+        if self.graph is not None:
+            ids = self.bar_ids + self.axis_ids + [id for id, _ in self.label_ids] + [self.guide_id, self.guide_label_id]
+            for id in ids:
+                if id is not None:
+                    self.graph.delete_figure(id)
+        self.bar_ids, self.axis_ids, self.label_ids = [], [], []
+        self.guide_id = self.guide_label_id = None
+
+
+    def show(self, conv) -> None:
+        """
+        Makes the graph show the bars of `conv`, a Convolution whose sizes have been found and whose bars are made.
+        """
+        if conv.graph is not self.graph or conv.top_right != self.top_right:
+            self.clear()
+            self.graph, self.top_right = conv.graph, conv.top_right
+        graph = self.graph
+        resized = len(conv.bins) != len(self.bar_ids)
+
+        # Bars: add or delete to match the number of bins, then move them all into place
+        while len(self.bar_ids) < len(conv.bins):
+            self.bar_ids.append(conv.bins[len(self.bar_ids)].draw_bar())
+        while len(self.bar_ids) > len(conv.bins):
+            graph.delete_figure(self.bar_ids.pop())
+        for bar, id in zip(conv.bins, self.bar_ids):
+            Mainframe.set_coords(graph, id, *bar.hitbox)
+
+        # Axes: the ticks only move when the number of bins, and with it the bin width, changes
+        if resized or not self.axis_ids:
+            for id in self.axis_ids + [id for id, _ in self.label_ids]:
+                graph.delete_figure(id)
+            self.axis_ids, self.label_ids = conv.drawing_area()
+        else:
+            for id, i in self.label_ids:
+                graph.Widget.itemconfig(id, text=f'{conv.possible_outcomes[i]}')
+
+        # The guide line and its label follow the tallest bar
+        tallest_bar = max(conv.bins)
+        x = tallest_bar.x_coord + conv.bin_width + 1
+        y = tallest_bar.size[1]
+        label = f"p = {tallest_bar.probability:.4f}"
+        label_x = conv.top_right[0] - 40
+        if conv.approximation_error is not None:  # the normal approximation, shown with its estimated error
+            label = f"p ~ {tallest_bar.probability:.4f} +/- {conv.approximation_error:.0e}"
+            label_x = conv.top_right[0] - 75
+        if self.guide_id is None:
+            self.guide_id = graph.draw_line((x, y), (conv.top_right[0], y), color='#dcdcdc')
+            self.guide_label_id = graph.draw_text(text=label, location=(label_x, y + 10), font='_ 11 bold')
+        else:
+            Mainframe.set_coords(graph, self.guide_id, (x, y), (conv.top_right[0], y))
+            Mainframe.set_coords(graph, self.guide_label_id, (label_x, y + 10))
+            graph.Widget.itemconfig(self.guide_label_id, text=label)
+            graph.Widget.tag_raise(self.guide_id)  # stay above any bars that were just added
+            graph.Widget.tag_raise(self.guide_label_id)
+
+
 # ----------------------------------------------------------------------------------------------------------------------
 # 8888888b.  d8b          8888888888                        
 # 888  "Y88b Y8P          888                               
@@ -784,36 +1795,229 @@ class Convolution:
 # - used by the simulation to display each rolled die on the left side
 # ----------------------------------------------------------------------------------------------------------------------
 class DieFace:
-    def __init__(self, graph: sg.Graph, images, stack_position, x=-73, y=55, y_sep=40):
+    def __init__(self, graph: sg.Graph, images: ImageCache, stack_position, x=-73, y=55, y_sep=40):
         """
         Each DieFace knows all 6 die face images and can swap between them.
+        The canvas item is made once; changing the face points it at another of the cached images.
         """
         self.stack_position = stack_position
         self.face_number = 1
         self.graph = graph
         self.location = (x, (self.stack_position * y_sep) + y)
-        self.images = {
-            1: images.die1,
-            2: images.die2,
-            3: images.die3,
-            4: images.die4,
-            5: images.die5,
-            6: images.die6,
-        }
+        self.images = {number: images.get(f'die{number}') for number in range(1, 7)}
         self.image_id = None
-        self.image_data = self.set_image()
+        self.set_image()
 
     def erase(self):
         self.graph.delete_figure(self.image_id)
         self.image_id = None
 
     def set_image(self, number = None):
+        if self.image_id is not None and number in (None, self.face_number):
+            return
         if number:
             self.face_number = number
-        if self.image_id is not None:
-            self.erase()
-        self.image_data = self.images[self.face_number]
-        self.image_id = self.graph.draw_image(data=self.image_data, location=self.location)
+        image = self.images[self.face_number]
+        if self.image_id is None:
+            canvas_xy = self.graph._convert_xy_to_canvas_xy(*self.location)
+            self.image_id = self.graph.Widget.create_image(canvas_xy, image=image, anchor='nw')
+        else:
+            self.graph.Widget.itemconfig(self.image_id, image=image)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Alias Table
+#
+# - Walker's alias method, used by the `dice sampler` to draw faces and sums in O(1) each.
+# ----------------------------------------------------------------------------------------------------------------------
+class AliasTable:
+    def __init__(self, probabilities, rng: np.random.Generator = None):
+        """
+        Splits the probabilities into equal columns that each hold at most two categories: the column's own, with
+        probability `threshold[i]`, and one other, `alias[i]`.  A draw picks a column uniformly, then one of its two
+        categories with a single comparison, so it costs the same for 6 categories as for 60,000.
+        Built in O(K) with Vose's method.
+        :param probabilities: Type - list[float]: Need not be normalized.
+        """
+        self.rng: np.random.Generator = rng if rng is not None else np.random.default_rng()
+        probabilities = np.asarray(probabilities, dtype=float)
+        size = len(probabilities)
+        scaled = probabilities * size / probabilities.sum()  # the average column holds exactly 1
+        self.threshold = np.ones(size)
+        self.alias = np.arange(size)
+
+        small = [i for i in range(size) if scaled[i] < 1]
+        large = [i for i in range(size) if scaled[i] >= 1]
+        while small and large:
+            short_column, donor = small.pop(), large.pop()
+            self.threshold[short_column] = scaled[short_column]
+            self.alias[short_column] = donor  # the donor tops up the short column
+            scaled[donor] += scaled[short_column] - 1
+            (small if scaled[donor] < 1 else large).append(donor)
+        # whatever is left is within round-off of 1, and keeps its threshold of 1
+
+
+    def __len__(self) -> int:
+        return len(self.threshold)
+
+
+    def draw(self, size) -> np.ndarray:
+        """
+        Draws an array of category indices of the given size (or shape).
+        """
+        columns = self.rng.integers(len(self.threshold), size=size)
+        keep = self.rng.random(size) < self.threshold[columns]
+        return np.where(keep, columns, self.alias[columns])
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Dice Sampler
+#
+# - Rolls dice in bulk with numpy. Lives in a `simulation`, which takes its rolls from it.
+# ----------------------------------------------------------------------------------------------------------------------
+class DiceSampler:
+    def __init__(self, distribution: list[float], dice: int, batch_size: int = None, seed: int = None, mode: str = 'faces',
+                 sum_distribution: tuple[int, np.ndarray] = None, engine: ConvolutionEngine = None):
+        """
+        Draws whole blocks of rolls at once instead of one die at a time.
+        :param distribution: Type - list[float]: The die distribution, normalized to 1.
+        :param dice: Type - int: The number of dice per roll.
+        :param batch_size: Type - int: Rolls drawn ahead by `next_roll`. Defaults to about 1 MB of faces.
+        :param seed: Type - int: Seed for the random generator, for reproducible rolls.
+        :param mode: Type - str: 'faces' draws every die. 'counts' draws only how many of each face came up, straight from
+                                 a multinomial(dice, distribution), which is O(6) per roll instead of O(dice).
+                                 'sums' draws only the sum, from `sum_distribution`, which is O(1) per roll.
+        :param sum_distribution: Type - tuple[int, np.ndarray]: (smallest outcome, probabilities), e.g. from a Convolution.
+                                                                 Required in 'sums' mode.
+        :param engine: Type - ConvolutionEngine: Computes the partial sums for `faces_for_sum`. Required in 'sums' mode.
+        """
+        self.rng = np.random.default_rng(seed)
+        self.mode: str = mode
+        self.dice: int = dice
+        self.distribution = np.asarray(distribution, dtype=float) / sum(distribution)
+        self.face_table = AliasTable(self.distribution, self.rng)  # draws faces - 1
+
+        # Sum sampling
+        self.engine: ConvolutionEngine = engine
+        if sum_distribution is not None:
+            self.first_sum: int = sum_distribution[0]
+            self.sum_table = AliasTable(sum_distribution[1], self.rng)  # draws sums - first_sum
+
+        # Preallocated buffers for `next_roll`
+        self.batch_size: int = batch_size or max(1, 2 ** 20 // (dice if mode == 'faces' else 6))
+        if mode == 'faces':
+            self.batch_faces = np.empty((self.batch_size, dice), dtype=np.uint8)
+        elif mode == 'counts':
+            self.batch_counts = np.empty((self.batch_size, 6), dtype=np.int64)
+        self.batch_sums = np.empty(self.batch_size, dtype=np.int64)
+        self.batch_index: int = self.batch_size  # the buffers start empty
+
+
+    def sample(self, faces: np.ndarray, sums: np.ndarray = None, chunk: int = 2 ** 20) -> None:
+        """
+        Fills a preallocated (rolls x dice) array with faces (1 to 6), and optionally `sums` with the sum of each roll.
+        Works through `chunk` faces at a time so the random numbers never take much memory.
+        """
+        rows_per_chunk = max(1, chunk // max(1, faces.shape[1]))
+        for start in range(0, len(faces), rows_per_chunk):
+            block = faces[start : start + rows_per_chunk]
+            block[:] = self.face_table.draw(block.shape) + 1
+            if sums is not None:
+                np.sum(block, axis=1, out=sums[start : start + rows_per_chunk])
+
+
+    def roll(self, rolls: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the faces, (rolls x dice) uint8, and the sums, int64, of `rolls` new rolls.
+        """
+        faces = np.empty((rolls, self.dice), dtype=np.uint8)
+        sums = np.empty(rolls, dtype=np.int64)
+        self.sample(faces, sums)
+        return faces, sums
+
+
+    def sample_counts(self, counts: np.ndarray, sums: np.ndarray = None) -> None:
+        """
+        Fills a preallocated (rolls x 6) array with the number of dice that landed on each face, and optionally `sums`.
+        """
+        counts[:] = self.rng.multinomial(self.dice, self.distribution, size=len(counts))
+        if sums is not None:
+            np.dot(counts, np.arange(1, 7), out=sums)
+
+
+    def sample_sums(self, sums: np.ndarray) -> None:
+        """
+        Fills a preallocated array with sums drawn straight from the sum distribution, with an alias table.
+        The cost per roll does not depend on the number of dice.
+        """
+        np.add(self.sum_table.draw(len(sums)), self.first_sum, out=sums)
+
+
+    def faces_for_sum(self, total: int) -> list[int]:
+        """
+        Draws the individual dice of a roll known only by its sum, from their distribution given that sum.
+        Splits the dice into two halves and draws the sum of the first half a with weights P(S_left = a) P(S_right = total - a),
+        then does the same for each half until single dice remain.  Only the powers of the die for about 2 log2(n) distinct
+        numbers of dice are needed, and the engine caches them.
+        """
+        faces = []
+        stack = [(self.dice, total - self.dice)]  # (number of dice, their sum counted from the number of dice)
+        while stack:
+            dice, offset = stack.pop()
+            if dice == 1:
+                faces.append(offset + 1)
+                continue
+            left, right = dice // 2, dice - dice // 2
+            first = max(0, offset - 5 * right)
+            last = min(5 * left, offset)
+            with self.engine.lock:
+                left_dist = self.engine.power(self.distribution, left)
+                right_dist = self.engine.power(self.distribution, right)
+            weights = left_dist[first : last + 1] * right_dist[offset - last : offset - first + 1][::-1]
+            if not weights.sum() > 0:  # far enough in the tails that the probabilities underflow, weigh in log-space instead
+                with self.engine.lock:
+                    left_dist = self.engine.log_power(self.distribution, left)
+                    right_dist = self.engine.log_power(self.distribution, right)
+                weights = left_dist[first : last + 1] + right_dist[offset - last : offset - first + 1][::-1]
+                weights = np.exp(weights - weights.max())
+            left_offset = first + self.rng.choice(len(weights), p=weights / weights.sum())
+            stack.append((left, left_offset))
+            stack.append((right, offset - left_offset))
+        self.rng.shuffle(faces)
+        return faces
+
+
+    def arrange(self, counts) -> list[int]:
+        """
+        Lays out the faces of a roll known only by its face counts, in a random order. Every order is equally likely, so
+        this gives the individual dice the same distribution as if they had been rolled one at a time.
+        """
+        faces = np.repeat(np.arange(1, 7, dtype=np.uint8), counts)
+        self.rng.shuffle(faces)
+        return faces.tolist()
+
+
+    def next_roll(self) -> tuple[np.ndarray | None, np.ndarray | None, int]:
+        """
+        A single roll as (faces, face counts, sum), served from the buffers, which are refilled a whole batch at a time.
+        Only the faces are given in 'faces' mode, only the face counts in 'counts' mode, and only the sum in 'sums' mode;
+        the others are None.
+        """
+        if self.batch_index == self.batch_size:
+            if self.mode == 'faces':
+                self.sample(self.batch_faces, self.batch_sums)
+            elif self.mode == 'counts':
+                self.sample_counts(self.batch_counts, self.batch_sums)
+            else:
+                self.sample_sums(self.batch_sums)
+            self.batch_index = 0
+        index = self.batch_index
+        self.batch_index += 1
+        if self.mode == 'faces':
+            return self.batch_faces[index], None, int(self.batch_sums[index])
+        if self.mode == 'counts':
+            return None, self.batch_counts[index], int(self.batch_sums[index])
+        return None, None, int(self.batch_sums[index])
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -826,7 +2030,7 @@ class DieFace:
 # Y88b  d88P 888 888  888  888 Y88b 888 888 888  888 Y88b.  888 Y88..88P 888  888 
 #  "Y8888P"  888 888  888  888  "Y88888 888 "Y888888  "Y888 888  "Y88P"  888  888
 #
-# - Creates `roll` objects and draws them on the graph according to their sum, frequency, and size.
+# - Stores the rolls and draws them on the graph according to their sum, frequency, and size.
 # ----------------------------------------------------------------------------------------------------------------------
 class Simulation:
     def __init__(self, frame: Mainframe):
@@ -852,28 +2056,43 @@ class Simulation:
         self.f.window['sim column'].Widget.canvas.yview_moveto(1.0)  # adjust the graph slider to be at the bottom
         self.f.window['Pause'].update(text='Pause')
         self.trial_number = 1
+        self.roll_seconds: float = 0.0  # time spent drawing rolls from the sampler and storing them
+        self.draw_seconds: float = 0.0  # time spent drawing rolls on the graph
         self.f.matching_graphs = True
 
         self.possible_outcomes = self.f.convolution.possible_outcomes  # Must have own copy so that the convolution is free to change
         self.convolution: list[float] = self.f.convolution.conv_dist  # the distribution as a list, not the entire object
+        self.log_convolution: np.ndarray = self.f.convolution.log_conv_dist  # the same as log probabilities, in log-space mode
         self.outcome_counter: dict[int, int] = {outcome: 0 for outcome in self.possible_outcomes}
-        self.partition = self.make_partition()  # partition the closed set [0, 1] according to the die distribution, used for rolling
+        sampling_mode = self.f.sampling_mode
+        if sampling_mode == 'auto':
+            sampling_mode = 'counts' if self.number_of_dice >= self.f.multinomial_threshold else 'faces'
+        self.sampler = DiceSampler(self.dist, self.number_of_dice, mode=sampling_mode,
+                                   batch_size=min(self.number_of_rolls, max(1, 2 ** 20 // self.number_of_dice)),
+                                   sum_distribution=(self.possible_outcomes[0], self.sum_weights()), engine=self.f.convolution_engine)
 
-        # Possible redundancy, but we keep two copies of all the rolls.  One is a list ordered by trial number,
-        #   the other is a dictionary with a key for each possible outcome.
-        # The list is used for hit detection, the dictionary is used for column selection.
-        # Hit detection could be optimized to use the dictionary and only search the bins of the corresponding x-range but would make the function less general.
-        self.rolls: list[Roll] = []
-        self.bin_dictionary: dict[int, list[Roll]] = {outcome: [] for outcome in self.possible_outcomes}  # for bin, outcomes in self.bin_dictionary.items(): ...
+        # Every roll, one row each, with `Roll` views on a row. The drawn rolls are kept in its `GridIndex` for hit detection.
+        self.rolls = RollStore(self.number_of_rolls, self.number_of_dice, sim=self, keep_faces=sampling_mode == 'faces')
 
         # Drawing area from (0, 0) to (xMax - left_margin - right_margin, yMax - top_margin - bottom_margin)
         self.top_right = (self.f.sim_graph_size[0] - sum(self.f.sim_margins[0]),  # x-coord
                           self.f.sim_graph_size[1] - sum(self.f.sim_margins[1]))  # y-coord
         self.box_width, self.box_height = self.find_box_size()
+        self.index_geometry()
         self.drawing_area()  # Requires knowledge of the box sizes for x-tick & y-tick locations.
         self.die_faces: list[DieFace] = None  # The DieFace objects that display the current, or currently displaying roll.
         self.draw_dice()                      # Populates `self.die_faces` and draws them.
 
+        # Large simulations skip the animation, see `roll_all`
+        self.instant: bool = self.number_of_rolls >= self.f.instant_threshold
+        # Past `max_roll_items` rolls, a canvas item per roll slows Tk to a crawl. Each column is then a single bar that
+        #   grows with `outcome_counter`, and one green box marks the latest roll. The rolls are still stored and hit tested.
+        self.aggregate: bool = self.number_of_rolls > self.f.max_roll_items
+        self.column_ids: dict[int, int] = {}  # the bar of each column, by sum, in aggregate mode
+        self.latest_roll_id: int = None       # the green box over the latest roll, in aggregate mode
+        # Otherwise only the rolls in view, give or take a margin, have a box. See `RollViewport`.
+        self.viewport = RollViewport(self)
+
         # Display
         self.selection_box_id = None
         self.display_ids: list = []
@@ -924,25 +2143,104 @@ class Simulation:
         self.column_outline_ids.append(self.graph.draw_line((x2, 0), (x2, y), color='magenta'))
 
 
+    # Every box, or column bar, carries the tag of its column, `bin_tag(sum)`, and the latest roll's box also carries
+    #   the tag 'latest', so (de)selecting a column is a single itemconfig however many rolls are in it.
+    @staticmethod
+    def bin_tag(bin: int) -> str:
+        return f'bin{bin}'
+
+
+    def tag_box(self, id: int, bin: int = None, latest: bool = False):
+        """
+        Gives a box the tag of its column and, if it is the latest roll, takes the 'latest' tag from the previous one.
+        """
+        if latest:
+            self.graph.Widget.dtag('latest')
+        tags = ((self.bin_tag(bin),) if bin is not None else ()) + (('latest',) if latest else ())
+        self.graph.Widget.itemconfig(id, tags=tags)
+
+
     def select_bin(self, previous_bin):
         if previous_bin:
-            for roll in self.bin_dictionary[previous_bin]:
-                self.graph.Widget.itemconfig(roll.id, fill='cyan')
-        for roll in self.bin_dictionary[self.selected_bin]:
-            self.graph.Widget.itemconfig(roll.id, fill='Royal Blue')
-        self.graph.Widget.itemconfig(self.rolls[-1], fill='green')  # ensure the final roll is still green
+            self.graph.Widget.itemconfig(self.bin_tag(previous_bin), fill='cyan')
+        self.graph.Widget.itemconfig(self.bin_tag(self.selected_bin), fill='Royal Blue')
+        self.highlight_latest()  # ensure the final roll is still green
 
     
     def deselect_all_bins(self):
-        if self.selected_bin:  # ensure that a bin was actually selected
+        if self.selected_bin:  # ensure that a bin was actually selected, only its column is highlighted
+            self.graph.Widget.itemconfig(self.bin_tag(self.selected_bin), fill='cyan')
             self.selected_bin = None
-            for roll in self.rolls:
-                self.graph.Widget.itemconfig(roll.id, fill='cyan')
             self.column_outline_ids = self.delete_ids(self.column_outline_ids)
         if self.f.convolution.selection_box_id:
             self.f.con_graph.delete_figure(self.f.convolution.selection_box_id)
             self.f.convolution.selection_box_id = None
-        self.graph.Widget.itemconfig(self.rolls[-1], fill='green')  # ensure the final roll is still green
+        self.highlight_latest()  # ensure the final roll is still green
+
+
+    def highlight_latest(self):
+        self.graph.Widget.itemconfig('latest', fill='green')
+        if self.latest_roll_id is not None:
+            self.graph.Widget.tag_raise('latest')
+
+
+    def index_geometry(self):
+        """
+        Points the grid index of the rolls at the box size.  Called once, when the simulation starts: the boxes keep the
+        size `find_box_size` gave them for the whole simulation, and resizing the window leaves the graph's coordinates
+        alone, so neither can move a box out from under the index.
+        """
+        self.rolls.grid.set_geometry((self.box_width, self.box_height), first_column=self.possible_outcomes[0])
+
+
+    def roll_at(self, click: tuple):
+        """
+        The roll under a click, found by dividing the click by the box size in the grid index, or None.
+        """
+        index = self.rolls.grid.query(click)
+        return self.rolls[index] if index is not None else None
+
+
+    def draw_box(self, index: int) -> int:
+        """
+        Draws the box of a stored roll, in the colour it would have if it had been drawn as it was rolled.
+        """
+        store = self.rolls
+        x = (int(store.sums[index]) - self.possible_outcomes[0]) * self.box_width
+        y = (int(store.frequencies[index]) - 1) * self.box_height
+        if index == store.last_drawn:
+            fill = 'green'
+        else:
+            fill = 'Royal Blue' if store.sums[index] == self.selected_bin else 'cyan'
+        store.ids[index] = self.graph.draw_rectangle((x, y + self.box_height), (x + self.box_width, y), fill_color=fill)
+        self.tag_box(int(store.ids[index]), int(store.sums[index]), latest=index == store.last_drawn)
+        return int(store.ids[index])
+
+
+    def draw_column(self, bin: int):
+        """
+        Draws the bar of a column in aggregate mode, as tall as the rolls in it, or grows the bar it already has.
+        """
+        x = (bin - self.possible_outcomes[0]) * self.box_width
+        top_left, bottom_right = (x, self.outcome_counter[bin] * self.box_height), (x + self.box_width, 0)
+        if bin in self.column_ids:
+            self.f.set_coords(self.graph, self.column_ids[bin], top_left, bottom_right)
+        else:
+            fill = 'Royal Blue' if bin == self.selected_bin else 'cyan'
+            self.column_ids[bin] = self.graph.draw_rectangle(top_left=top_left, bottom_right=bottom_right, fill_color=fill)
+            self.tag_box(self.column_ids[bin], bin)
+
+
+    def mark_latest(self, top_left: tuple, bottom_right: tuple):
+        """
+        Moves the green box that marks the latest roll in aggregate mode, and keeps it above the column bars.
+        """
+        if self.latest_roll_id is None:
+            self.latest_roll_id = self.graph.draw_rectangle(top_left=top_left, bottom_right=bottom_right, fill_color='green')
+            self.tag_box(self.latest_roll_id, latest=True)
+        else:
+            self.f.set_coords(self.graph, self.latest_roll_id, top_left, bottom_right)
+        self.graph.Widget.tag_raise(self.latest_roll_id)
 
 
     def delete_ids(self, id_list=None):
@@ -959,7 +2257,7 @@ class Simulation:
     def draw_dice(self):
         self.die_faces = []
         for dice in range(self.number_of_dice):
-            new_die_face = DieFace(graph=self.graph, images=self.f.images, stack_position=dice)
+            new_die_face = DieFace(graph=self.graph, images=self.f.image_cache, stack_position=dice)
             self.die_faces.append(new_die_face)
         # roll info separator
         self.graph.draw_line((-40, 20), (-84, 20))
@@ -968,7 +2266,10 @@ class Simulation:
     def find_box_size(self):
         # should be a smooth function from 2px to x% of drawing area
         viewing_window_height = int(self.f.sim_viewing_height * 0.75)  
-        highest_probability = float(max(self.convolution))
+        if self.log_convolution is not None:
+            highest_probability = float(np.exp(np.max(self.log_convolution)))
+        else:
+            highest_probability = float(max(self.convolution))
         print(f'{highest_probability = }', end=" : ")
         approx_most_outcomes = self.number_of_rolls * highest_probability * 1
         approx_most_outcomes = int(approx_most_outcomes) if approx_most_outcomes > 1 else 1
@@ -985,32 +2286,357 @@ class Simulation:
         return box_width, box_height
     
 
-    def make_partition(self, distribution=None):
-        if distribution is None:
-            distribution = self.dist
-        partition = [0]
-        total = 0
-        for i in range(len(distribution)):
-            total += distribution[i]
-            partition.append(total)
-        return partition
-    
-    
-    def roll_dice(self, count:int = 1):
-        counter = self.outcome_counter
+    def sum_weights(self) -> np.ndarray:
+        """
+        The weights the sampler draws sums with.  In log-space mode they are taken relative to the most likely sum, so the
+        tails keep every weight that is not negligible next to it.
+        """
+        if self.log_convolution is not None:
+            return np.exp(self.log_convolution - np.max(self.log_convolution))
+        return self.convolution
+
+
+    def roll_all(self):
+        """
+        Rolls every trial up front with the vectorized sampler, stacks the rolls into their columns with np.bincount,
+        then draws the finished graph in one pass.  Only the last roll is displayed, and only its dice are shown.
+        """
+        store = self.rolls
+        rolls = self.number_of_rolls - len(store)
+        sums = np.empty(rolls, dtype=np.int64)
+        faces, face_counts = None, None
+        if self.sampler.mode == 'faces' and store.faces is not None:
+            faces = store.faces[len(store):]  # rolled in place
+            self.sampler.sample(faces, sums)
+        elif self.sampler.mode in ('faces', 'counts'):  # the counts of the faces have the same distribution as the faces
+            face_counts = np.empty((rolls, 6), dtype=np.int64)
+            self.sampler.sample_counts(face_counts, sums)
+        else:
+            self.sampler.sample_sums(sums)
+
+        frequencies = self.stack_rolls(sums)
+        first = len(store)
+        store.extend(sums, frequencies, faces=faces, face_counts=face_counts)
+        self.trial_number = self.number_of_rolls + 1
+        self.draw_rolls(first)
+
+
+    def stack_rolls(self, sums: np.ndarray) -> np.ndarray:
+        """
+        The frequency of each of a block of new rolls, its height in its column, which is 0 for outliers.
+        Also adds the rolls to the `outcome_counter`.
+        """
+        first, bins = self.possible_outcomes[0], len(self.possible_outcomes)
+        columns = sums - first
+        outliers = (columns < 0) | (columns >= bins)
+        columns[outliers] = bins  # gather the outliers in a column of their own past the last
+        column_counts = np.bincount(columns, minlength=bins + 1)
+        stacked = np.array([self.outcome_counter[outcome] for outcome in self.possible_outcomes] + [0])  # already in each column
+
+        # Sorting the rolls by column, stably, keeps them in roll order within a column, so their rank is their height.
+        order = np.argsort(columns, kind='stable')
+        column_starts = np.cumsum(column_counts) - column_counts
+        frequencies = np.empty(len(sums), dtype=np.int64)
+        frequencies[order] = np.arange(len(sums)) - np.repeat(column_starts - stacked, column_counts) + 1
+        frequencies[outliers] = 0
+        if outliers.any():
+            print(f'{outliers.sum()} outliers encountered, from {sums[outliers].min()} to {sums[outliers].max()}')
+
+        for outcome, count in zip(self.possible_outcomes, column_counts[:bins].tolist()):
+            self.outcome_counter[outcome] += count
+        return frequencies
+
+
+    def draw_rolls(self, first: int = 0):
+        """
+        Draws the stored rolls from index `first` on in a single pass, then displays the last one.
+        """
+        store = self.rolls
+        drawn = first + np.flatnonzero(store.frequencies[first:len(store)])
+        if len(drawn):
+            store.last_drawn = int(drawn[-1])
+        if self.aggregate:  # a bar per column
+            for bin in self.possible_outcomes:
+                if self.outcome_counter[bin]:
+                    self.draw_column(bin)
+        else:  # a box per roll, for the rolls in view
+            self.viewport.refresh(force=True)
+        if len(drawn):
+            if self.aggregate:
+                self.mark_latest(*store[store.last_drawn].hitbox)
+            self.highlight_latest()
+            if not self.displaying_roll:
+                store[store.last_drawn].display()
+
+
+    def roll_dice(self, count:int = 1, animate: bool = True):
+        # Takes the next roll from the sampler, stores it, and draws it through a `Roll` view.
+        # In the sampler's 'counts' mode only the face counts are drawn, and in its 'sums' mode only the sum.
+        #   The individual dice are then drawn the first time the roll is displayed.
+        # With `animate` False the roll's box is drawn, but the die faces and the roll info are left alone.
+        # The time spent rolling and drawing is added up in `roll_seconds` and `draw_seconds` for the `RollScheduler`.
         # b64_image_data = getattr(self.f.images, f'die{(count % 6) + 1}')
         # self.f.window['dice gif'].update(data=b64_image_data)
-        if count == 1:
-            prev_roll = None
-        else:
-            prev_roll = self.rolls[count - 2]  # - 2 since count starts at 1, but rolls index starts at 0
-        this_roll = Roll(sim=self, roll_number=count, partition=self.partition, counter=counter, box_size=(self.box_width, self.box_height), 
-                         graph=self.graph, dice=self.number_of_dice, previous_roll=prev_roll)
-        self.rolls.append(this_roll)
-        self.bin_dictionary[int(this_roll.sum)].append(this_roll)
+        start = time.perf_counter()
+        counter = self.outcome_counter
+        faces, face_counts, roll_sum = self.sampler.next_roll()
+
+        try:  # the roll landed in a displayed bin, count it, then draw it
+            counter[roll_sum] += 1
+            frequency = counter[roll_sum]
+        # Outliers are stored but not drawn, with a frequency of 0.  As it is, outliers are *very* rare.
+        except KeyError as ke:
+            print(f'{roll_sum = }\n{counter = }\n\n{ke}')
+            sg.popup_quick_message(f'Outlier encountered: {roll_sum}', background_color='#1b1b1b', text_color='#fafafa', auto_close_duration=1, grab_anywhere=True, keep_on_top=True)
+            frequency = 0
+        index = self.rolls.append(roll_sum, frequency, faces=faces, face_counts=face_counts)
+        this_roll = Roll(self, index)
+        rolled = time.perf_counter()
+
+        if faces is not None and animate and not self.displaying_roll:  # set the images
+            for die_face, face in zip(self.die_faces, faces.tolist()):
+                die_face.set_image(face)
+        if frequency:
+            this_roll.draw_roll(*this_roll.hitbox)
+            if animate and not self.displaying_roll:
+                this_roll.display(set_faces=False)
+        self.roll_seconds += rolled - start
+        self.draw_seconds += time.perf_counter() - rolled
         return this_roll
 
 
+# ----------------------------------------------------------------------------------------------------------------------
+# Roll Scheduler
+#
+# - Decides how many rolls the `simulation` takes per pass of the event loop. Lives in the `mainframe`.
+# ----------------------------------------------------------------------------------------------------------------------
+class RollScheduler:
+    def __init__(self, frame_budget: float = 0.012, max_speed: bool = False, smoothing: float = 0.25):
+        """
+        Runs as many rolls per frame as fit in `frame_budget`, instead of one roll per read of the window.
+        The batch size comes from moving averages of the measured cost of rolling and of drawing a roll, and a frame is
+        cut short if it runs over the budget anyway.
+        :param frame_budget: Type - float: Seconds of rolling per frame. The window is read, and redrawn, in between.
+        :param max_speed: Type - bool: Only the last roll of each frame sets the die faces and the roll info.
+        :param smoothing: Type - float: Weight of the newest frame in the moving averages.
+        """
+        self.frame_budget: float = frame_budget
+        self.max_speed: bool = max_speed
+        self.smoothing: float = smoothing
+        self.roll_cost: float = None  # seconds per roll spent in the sampler and the store, None until measured
+        self.draw_cost: float = None  # seconds per roll spent on the canvas
+        self.batch: int = 1           # rolls in the most recent frame
+
+
+    def __repr__(self) -> str:
+        costs = f'{self.roll_cost * 1e6:.1f} + {self.draw_cost * 1e6:.1f} us per roll' if self.roll_cost is not None else 'not measured'
+        return f'RollScheduler: {self.frame_budget * 1000:.0f} ms frames, {self.batch} rolls per frame, {costs}'
+
+
+    def batch_size(self, remaining: int) -> int:
+        """
+        Rolls to run in the next frame.  A single roll until the costs have been measured.
+        """
+        if self.roll_cost is None:
+            return 1
+        per_roll = self.roll_cost + self.draw_cost
+        return max(1, min(remaining, int(self.frame_budget / per_roll) if per_roll > 0 else remaining))
+
+
+    def run(self, sim: Simulation) -> int:
+        """
+        Runs a frame of the simulation and returns the number of rolls it took.
+        """
+        batch = self.batch_size(sim.number_of_rolls - sim.trial_number + 1)
+        roll_seconds, draw_seconds = sim.roll_seconds, sim.draw_seconds
+        deadline = time.perf_counter() + self.frame_budget
+        rolls = 0
+        while rolls < batch:
+            rolls += 1
+            last = rolls == batch or time.perf_counter() >= deadline
+            sim.roll_dice(sim.trial_number, animate=last or not self.max_speed)
+            sim.trial_number += 1
+            if last:
+                break
+        self.measure(rolls, sim.roll_seconds - roll_seconds, sim.draw_seconds - draw_seconds)
+        self.batch = rolls
+        return rolls
+
+
+    def measure(self, rolls: int, roll_seconds: float, draw_seconds: float) -> None:
+        """
+        Folds the costs of a frame into the moving averages.
+        """
+        roll_cost, draw_cost = roll_seconds / rolls, draw_seconds / rolls
+        if self.roll_cost is None:
+            self.roll_cost, self.draw_cost = roll_cost, draw_cost
+        else:
+            self.roll_cost += self.smoothing * (roll_cost - self.roll_cost)
+            self.draw_cost += self.smoothing * (draw_cost - self.draw_cost)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Roll Viewport
+#
+# - Keeps canvas items only for the rolls of a `simulation` that are in view of the scrollable 'sim column'.
+# ----------------------------------------------------------------------------------------------------------------------
+class RollViewport:
+    def __init__(self, sim: Simulation, margin: int = None):
+        """
+        The simulation graph is far taller than the part of it that the 'sim column' shows.  Rolls outside of the
+        column's view, plus `margin`, get no box; boxes are drawn as they scroll into view and deleted as they leave it,
+        so the number of canvas items is bounded by the size of the view, not by the number of rolls.
+        :param margin: Type - int: Pixels above and below the view that are kept drawn. Defaults to half a view.
+        """
+        self.sim: Simulation = sim
+        self.canvas = sim.f.window['sim column'].Widget.canvas  # the scrolling canvas of the column, not the graph's
+        self.margin: int = margin if margin is not None else sim.f.sim_viewing_height // 2
+        self.view: tuple[float, float] = tuple(self.canvas.yview())  # the column's yview at the last refresh
+        self.rows: tuple[int, int] = self.visible_rows()               # lowest and highest frequency kept drawn
+
+
+    def __repr__(self) -> str:
+        return f'RollViewport: frequencies {self.rows[0]} to {self.rows[1]}'
+
+
+    def visible_rows(self) -> tuple[int, int]:
+        """
+        The lowest and highest frequency with a box in view of the column, margin included.
+        """
+        top, bottom = self.canvas.yview()  # fractions of the column's height
+        graph = self.sim.graph
+        height = graph.CanvasSize[1]
+        y_high = graph._convert_canvas_xy_to_xy(0, top * height)[1] + self.margin
+        y_low = graph._convert_canvas_xy_to_xy(0, bottom * height)[1] - self.margin
+        return max(1, int(y_low // self.sim.box_height) + 1), int(y_high // self.sim.box_height) + 1
+
+
+    def shows(self, frequency: int) -> bool:
+        return self.rows[0] <= frequency <= self.rows[1]
+
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Draws the stored rolls that came into view and deletes the boxes of those that left it.
+        Does nothing if the column has not scrolled since the last refresh, unless `force` is True.
+        Returns whether it refreshed.
+        """
+        if self.sim.aggregate:  # the columns are single bars, there are no boxes to manage
+            return False
+        view = tuple(self.canvas.yview())
+        if view == self.view and not force:
+            return False
+        self.view = view
+        self.rows = self.visible_rows()
+
+        store = self.sim.rolls
+        frequencies, ids = store.frequencies[:len(store)], store.ids[:len(store)]
+        in_view = (frequencies >= self.rows[0]) & (frequencies <= self.rows[1])
+        for index in np.flatnonzero((ids != 0) & ~in_view).tolist():
+            self.sim.graph.delete_figure(int(ids[index]))
+            ids[index] = 0
+        for index in np.flatnonzero(in_view & (ids == 0)).tolist():
+            self.sim.draw_box(index)
+        return True
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Roll Store
+#
+# - The rolls of a `simulation`, kept column by column in numpy arrays. `roll` objects are views on one row.
+# ----------------------------------------------------------------------------------------------------------------------
+class RollStore:
+    def __init__(self, capacity: int, dice: int, sim=None, keep_faces: bool = True, faces_budget: int = 64 * 1024 ** 2):
+        """
+        One row per roll, filled in the order of the rolls.  A million rolls take about 26 MB without the faces.
+        :param capacity: Type - int: The number of rolls in the simulation.
+        :param dice: Type - int: The number of dice per roll.
+        :param sim: Type - Simulation: The simulation the rolls belong to, needed for the `roll` views.
+        :param keep_faces: Type - bool: Store every die of every roll. Only useful when the sampler draws the faces.
+        :param faces_budget: Type - int: Bytes the faces may take. Past it they are not stored, and a displayed roll has
+                                         its dice laid out again from its face counts.
+        """
+        self.sim: Simulation = sim
+        self.capacity: int = capacity
+        self.dice: int = dice
+        self.count: int = 0  # rolls stored so far
+        self.last_drawn: int = -1  # index of the most recent drawn roll, -1 if there is none
+        self.sums = np.zeros(capacity, dtype=np.int32)
+        self.frequencies = np.zeros(capacity, dtype=np.int32)  # the roll's height in its column, 0 for outliers
+        self.face_counts = np.zeros((capacity, 6), dtype=np.uint16)  # all zeros until known, in 'sums' mode
+        self.ids = np.zeros(capacity, dtype=np.int32)  # canvas ids of the drawn boxes, 0 if not drawn
+        self.faces: np.ndarray = None
+        if keep_faces and capacity * dice <= faces_budget:
+            self.faces = np.zeros((capacity, dice), dtype=np.uint8)
+        self.drawn_faces: dict[int, list[int]] = {}  # faces drawn after the fact for displayed rolls, by index
+        self.grid = GridIndex()  # the indices of the rolls, in the column of their sum and the row of their frequency - 1
+
+
+    def __repr__(self) -> str:
+        return f'RollStore({self.count:,} of {self.capacity:,} rolls, {self.nbytes / 1024 ** 2:.1f} MB)'
+
+
+    def __len__(self) -> int:
+        return self.count
+
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(f'roll index {index} out of range')
+        return Roll(self.sim, index)
+
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.sums, self.frequencies, self.face_counts, self.ids, self.faces)
+        return sum(array.nbytes for array in arrays if array is not None) + self.grid.nbytes
+
+
+    def append(self, roll_sum: int, frequency: int = 0, faces: np.ndarray = None, face_counts: np.ndarray = None) -> int:
+        """
+        Stores a roll and returns its index.  Only the face counts are required in 'counts' mode, only the sum in 'sums' mode.
+        """
+        index = self.count
+        self.sums[index] = roll_sum
+        self.frequencies[index] = frequency
+        if faces is not None:
+            self.face_counts[index] = np.bincount(faces, minlength=7)[1:]
+            if self.faces is not None:
+                self.faces[index] = faces
+        elif face_counts is not None:
+            self.face_counts[index] = face_counts
+        if frequency:
+            self.grid.add(roll_sum, np.array([frequency - 1]), np.array([index]))
+        self.count += 1
+        return index
+
+
+    def extend(self, sums: np.ndarray, frequencies: np.ndarray, faces: np.ndarray = None, face_counts: np.ndarray = None) -> None:
+        """
+        Stores a block of rolls at once, the vectorized `append`.
+        """
+        start, end = self.count, self.count + len(sums)
+        self.sums[start:end] = sums
+        self.frequencies[start:end] = frequencies
+        if faces is not None:
+            for face in range(1, 7):
+                np.sum(faces == face, axis=1, out=self.face_counts[start:end, face - 1], dtype=np.uint16)
+            if self.faces is not None:
+                self.faces[start:end] = faces
+        elif face_counts is not None:
+            self.face_counts[start:end] = face_counts
+
+        # file the rolls in the grid, a sum at a time
+        stacked = np.flatnonzero(frequencies)
+        order = stacked[np.argsort(sums[stacked], kind='stable')]
+        bins, starts = np.unique(sums[order], return_index=True)
+        for bin, group in zip(bins.tolist(), np.split(order, starts[1:])):
+            self.grid.add(bin, frequencies[group] - 1, start + group)
+        self.count = end
+
+
 # ----------------------------------------------------------------------------------------------------------------------
 # 8888888b.          888 888 
 # 888   Y88b         888 888 
@@ -1021,78 +2647,136 @@ class Simulation:
 # 888  T88b Y88..88P 888 888 
 # 888   T88b "Y88P"  888 888
 #
-# - A member of a simulation
+# - A view on one roll of a simulation
 # ----------------------------------------------------------------------------------------------------------------------
 class Roll:
-    def __init__(self, sim: Simulation, roll_number: int, partition, counter, box_size, graph, dice, previous_roll):
-        # rolls all the dice and creates a Roll object according to the outcome
-        # Inheritance
+    __slots__ = ('sim', 'index')
+
+    def __init__(self, sim: Simulation, index: int):
+        # A view on row `index` of the simulation's `RollStore`. Views are cheap and made whenever one is needed,
+        #   only the store holds on to the rolls.  Everything else is read from the simulation or the store on demand.
         self.sim: Simulation = sim
-        self.roll_number: int = roll_number
-        self.box_width: int | float = box_size[0]
-        self.box_height: int | float = box_size[1]
-        self.graph: sg.Graph = graph
-        self.dice: int = dice  # number of dice to be thrown
-        self.prev_roll: Roll = previous_roll
-
-        # Rolling
-        outcome: list = [0] * 6
-        self.individual_outcomes: list = []
-        for i in range(dice):
-            roll = random.random()
-            for j in range(7):
-                if partition[j] <= roll < partition[j + 1]:
-                    outcome[j] += 1
-                    try:  # set the images and record the individual outcomes
-                        if not self.sim.displaying_roll:
-                            sim.die_faces[i].set_image(j + 1)
-                        self.individual_outcomes.append(j + 1)
-                    except TypeError as te:
-                        print(f"index out of range, {i = }, {j + 1 = }\n{te}")
-                        raise TypeError
-        this_sum: int = np.dot(outcome, [1, 2, 3, 4, 5, 6])
-
-        try:  # the roll landed in a displayed bin, create and draw the Roll
-            counter[this_sum] += 1
-            self.frequency = counter[this_sum]
-            self.sum = this_sum  # X-coord in grid squares
-            self.outcome = outcome
-
-            # bottom left corner in pixels
-            y_coord = (counter[this_sum] - 1) * self.box_height  
-            x_coord = (this_sum - self.sim.possible_outcomes[0]) * self.box_width
-            self.px_coord = (x_coord, y_coord)
-            self.hitbox = self.make_hitbox()
-
-            self.id: int
-            self.draw_roll(*self.hitbox)
-            if not self.sim.displaying_roll:
-                self.display(set_faces=False)
-
-        # TODO Outliers are not properly handled, the object still needs to be instantiated in some way
-        # As it is, outliers are *very* rare but crash the program.
-        except KeyError as ke:  
-            print(f'{this_sum = }\n{counter = }\n\n{ke}')
-            sg.popup_quick_message(f'Outlier encountered: {this_sum}', background_color='#1b1b1b', text_color='#fafafa', auto_close_duration=1, grab_anywhere=True, keep_on_top=True)
-
-
-    def make_hitbox(self):
+        self.index: int = index
+
+
+    # Inheritance
+    @property
+    def store(self) -> RollStore:
+        return self.sim.rolls
+
+
+    @property
+    def roll_number(self) -> int:
+        return self.index + 1
+
+
+    @property
+    def box_width(self) -> int | float:
+        return self.sim.box_width
+
+
+    @property
+    def box_height(self) -> int | float:
+        return self.sim.box_height
+
+
+    @property
+    def graph(self) -> sg.Graph:
+        return self.sim.graph
+
+
+    @property
+    def dice(self) -> int:
+        return self.sim.number_of_dice  # number of dice thrown
+
+
+    # Rolling
+    @property
+    def sum(self) -> int:
+        return int(self.sim.rolls.sums[self.index])  # X-coord in grid squares
+
+
+    @property
+    def frequency(self) -> int:
+        return int(self.sim.rolls.frequencies[self.index])  # Y-coord in grid squares, 0 for outliers
+
+
+    @property
+    def id(self) -> int:
+        return int(self.sim.rolls.ids[self.index])
+
+
+    @id.setter
+    def id(self, id: int):
+        self.sim.rolls.ids[self.index] = id
+
+
+    # Geometry
+    @property
+    def px_coord(self) -> tuple:
+        # bottom left corner in pixels
+        y_coord = (self.frequency - 1) * self.sim.box_height
+        x_coord = (self.sum - self.sim.possible_outcomes[0]) * self.sim.box_width
+        return x_coord, y_coord
+
+
+    @property
+    def hitbox(self) -> tuple:
         # top-left, bottom-right
-        top_left = (self.px_coord[0], self.px_coord[1] + self.box_height)
-        bottom_right = self.px_coord[0] + self.box_width, self.px_coord[1]
+        x_coord, y_coord = self.px_coord
+        top_left = (x_coord, y_coord + self.sim.box_height)
+        bottom_right = x_coord + self.sim.box_width, y_coord
         return top_left, bottom_right
-    
-    
+
+
+    @property
+    def prev_roll(self):
+        return Roll(self.sim, self.index - 1) if self.index else None
+
+
+    @property
+    def individual_outcomes(self) -> list[int]:
+        store = self.store
+        if store.faces is not None and store.face_counts[self.index].any():
+            return store.faces[self.index].tolist()
+        if self.index not in store.drawn_faces:  # the dice were not kept; draw them now that they are needed
+            if store.face_counts[self.index].any():
+                store.drawn_faces[self.index] = self.sim.sampler.arrange(store.face_counts[self.index])
+            else:
+                store.drawn_faces[self.index] = self.sim.sampler.faces_for_sum(self.sum)
+        return store.drawn_faces[self.index]
+
+
+    @property
+    def outcome(self) -> list[int]:
+        """
+        The number of dice that landed on each face.
+        """
+        if not self.store.face_counts[self.index].any():
+            self.store.face_counts[self.index] = np.bincount(self.individual_outcomes, minlength=7)[1:]
+        return self.store.face_counts[self.index].tolist()
+
+
     def draw_roll(self, t_l=None, b_r=None, fill='green'):
         if t_l is None:
             t_l = (0, self.box_height)
         if b_r is None:
             b_r = (self.box_width, 0)
-        if self.prev_roll:  # change the previous roll to 'cyan' if its column isn't being highlighted. If it is, 'RoyalBlue' instead.
-            previous_box_id = self.prev_roll.id
-            box_color = 'Royal Blue' if self.prev_roll.sum == self.sim.selected_bin else 'cyan'
-            self.graph.TKCanvas.itemconfig(previous_box_id, fill=box_color)
-        self.id = self.graph.draw_rectangle(top_left=t_l, bottom_right=b_r, fill_color=fill)
+        if self.sim.aggregate:  # the column grows instead, and the latest roll is marked on top of it
+            self.sim.draw_column(self.sum)
+            self.sim.mark_latest(t_l, b_r)
+            self.store.last_drawn = self.index
+            return
+        previous = self.store.last_drawn
+        if previous >= 0 and self.store.ids[previous]:  # change the previous roll to 'cyan' if its column isn't being highlighted. If it is, 'RoyalBlue' instead.
+            box_color = 'Royal Blue' if self.store.sums[previous] == self.sim.selected_bin else 'cyan'
+            self.graph.TKCanvas.itemconfig(int(self.store.ids[previous]), fill=box_color)
+        self.store.last_drawn = self.index
+        if self.sim.viewport.shows(self.frequency):  # out of view, the viewport draws it once it is scrolled to
+            self.id = self.graph.draw_rectangle(top_left=t_l, bottom_right=b_r, fill_color=fill)
+            self.sim.tag_box(self.id, self.sum, latest=True)
+        else:
+            self.graph.Widget.dtag('latest')
 
     
     def is_hit(self, click: tuple, xoffset: int = 0, yoffset: int = 0, offset: None | int = None):
@@ -1100,9 +2784,10 @@ class Roll:
             xoffset = offset
             yoffset = offset
         if click:
-            half_length = abs(self.hitbox[0][0] - self.hitbox[1][0]) / 2
-            half_height = abs(self.hitbox[0][1] - self.hitbox[1][1]) / 2
-            center = (self.px_coord[0] + half_length, self.px_coord[1] + half_height)
+            hitbox, px_coord = self.hitbox, self.px_coord
+            half_length = abs(hitbox[0][0] - hitbox[1][0]) / 2
+            half_height = abs(hitbox[0][1] - hitbox[1][1]) / 2
+            center = (px_coord[0] + half_length, px_coord[1] + half_height)
             dx = abs(click[0] - center[0])
             dy = abs(click[1] - center[1])
             if dx - half_length <= xoffset and dy - half_height <= yoffset:
@@ -1144,15 +2829,29 @@ class Roll:
 # - A member of a convolution, uses the simulation when a bar is selected
 # ----------------------------------------------------------------------------------------------------------------------
 class Bar:
-    def __init__(self, conv, bin, prob, size, coord):
+    __slots__ = ('conv', 'bin', 'probability', 'size', 'x_coord')
+
+    def __init__(self, conv, bin, prob, size, coord, draw=True):
         self.conv: Convolution = conv
-        self.graph = self.conv.graph
         self.bin = bin                          # the label of the bin (not the index of the bin)
         self.probability = prob                 # probability of the sum
         self.size = size                        # pixel size of the bar
         self.x_coord = coord                    # x-coordinate of the bottom left corner
-        self.hitbox = self.make_hitbox()        # (top-left, bottom-right)
-        self.draw_bar(*self.hitbox)             # draws itself on the convolution graph
+        if draw:                                # draws itself on the convolution graph, unless a ConvolutionScene does
+            self.draw_bar(*self.hitbox)
+
+
+    @property
+    def graph(self) -> sg.Graph:
+        return self.conv.graph
+
+
+    @property
+    def hitbox(self) -> tuple:
+        # (top-left, bottom-right)
+        top_left = (self.x_coord, self.size[1])
+        bottom_right = (self.x_coord + self.size[0], 0)
+        return top_left, bottom_right
 
 
     def __repr__(self) -> str:
@@ -1167,18 +2866,12 @@ class Bar:
         return self.probability < other.probability and self.bin < other.bin
     
     
-    def make_hitbox(self):
-        top_left = (self.x_coord, self.size[1])
-        bottom_right = (self.x_coord + self.size[0], 0)
-        return top_left, bottom_right
-    
-           
     def draw_bar(self, t_l=None, b_r=None, fill='RoyalBlue4'):
         if t_l is None:  # top_left
             t_l = (0, self.size[1])
         if b_r is None:  # bottom_right
             b_r = (self.size[0], 0)
-        self.graph.draw_rectangle(top_left=t_l, bottom_right=b_r, fill_color=fill)
+        return self.graph.draw_rectangle(top_left=t_l, bottom_right=b_r, fill_color=fill)
 
 
     def is_hit(self, click: tuple, xoffset: int = 0, yoffset: int = 0, offset: None | int = None):
@@ -1186,9 +2879,10 @@ class Bar:
             xoffset = offset
             yoffset = offset
         if click:
-            half_length = abs(self.hitbox[0][0] - self.hitbox[1][0]) / 2
-            half_height = abs(self.hitbox[0][1] - self.hitbox[1][1]) / 2
-            center = (self.hitbox[0][0] + half_length, self.hitbox[1][1] + half_height)
+            hitbox = self.hitbox
+            half_length = abs(hitbox[0][0] - hitbox[1][0]) / 2
+            half_height = abs(hitbox[0][1] - hitbox[1][1]) / 2
+            center = (hitbox[0][0] + half_length, hitbox[1][1] + half_height)
             dx = abs(click[0] - center[0])
             dy = abs(click[1] - center[1])
             if dx - half_length <= xoffset and dy - half_height <= yoffset:
@@ -37,7 +37,7 @@ def main():
     # Event Loop
     # ----------------------------------------------------------------------------------------------------------------------
     while True:
-        event, mf.values = mf.window.read(timeout = 1000 // mf.update_interval)
+        event, mf.values = mf.window.read(timeout = mf.read_timeout())
         run_again = mf.maestro.handle(event)
         if not run_again:
             break
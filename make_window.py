@@ -20,8 +20,11 @@ def update_frame(window: sg.Window, frame: cl.Mainframe):
     # Initialize the maestro
     f.maestro = cl.EventHandler(frame)
 
+    # Convolutions are computed in the background from now on
+    f.convolution_worker = cl.ConvolutionWorker(frame)
+
     # drag-anywhere exclusions
-    drag_exclusions = ['convolution graph', 'simulation graph', 'Pause', 'go', 'add preset', 'Randomize', 'up', 'down']
+    drag_exclusions = ['convolution graph', 'simulation graph', 'Pause', 'go', 'max speed', 'add preset', 'Randomize', 'up', 'down']
     drag_exclusions += [f'face{i}' for i in range(1, 7)] + [f'lock{j}' for j in range(1, 7)]
     for item in drag_exclusions:
         f.window[f'{item}'].grab_anywhere_exclude()
@@ -83,7 +86,8 @@ def make_Mainframe(sg: sg, theme, frame: cl.Mainframe):
             ]
     
     sim_input_column_layout = [
-        [sg.Text('Number of rolls: ', p=((4, 0), (0, 4))), sg.Input(s=9, default_text=200, k='rolls', p=((0, 0), (0, 4)))],
+        [sg.Text('Number of rolls: ', p=((4, 0), (0, 4))), sg.Input(s=9, default_text=200, k='rolls', p=((0, 0), (0, 4))),
+         sg.Checkbox('Max speed', k='max speed', default=frame.scheduler.max_speed, enable_events=True, p=((8, 0), (0, 4)))],
         [sg.Push(), 
         sg.Button('Pause', button_color='#1b1b1b on darkgrey', font='Helvetica 12 bold', size=(8, 1), border_width=2),
         sg.Button('Roll!', k='go', border_width=2, size=(8, 1), bind_return_key=True, 
@@ -0,0 +1,163 @@
+"""
+Timing scripts for the performance sensitive parts of the program.  Run with `python tests/benchmarks.py`.
+"""
+import random
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # run from anywhere, import the classes from the repo root
+import classes as cl
+
+SKEWED_DIE = [0.47, 0.23, 0.16, 0.08, 0.04, 0.02]  # the 'Sloped' preset
+
+
+def best_time(statement, repeat=5, number=1):
+    """
+    The best of `repeat` timings, in milliseconds.
+    """
+    return min(timeit.repeat(statement, repeat=repeat, number=number)) / number * 1000
+
+
+def benchmark_convolution_methods(dice_counts=(10, 100, 300, 1000, 3000)):
+    engine = cl.ConvolutionEngine(cache=False, ladder_size=0)
+    methods = list(engine.methods)
+    print(f"{'dice':>6} " + ''.join(f'{method + " (ms)":>16}' for method in methods))
+    for n in dice_counts:
+        timings = [best_time(lambda: engine.power(SKEWED_DIE, n, method=method)) for method in methods]
+        print(f'{n:>6} ' + ''.join(f'{timing:>16.3f}' for timing in timings))
+
+
+def partition_scan_roll(partition, dice):
+    """
+    The original per-die roll: a random number per die and a scan of the partition for the face it landed on.
+    """
+    outcome = [0] * 6
+    for _ in range(dice):
+        roll = random.random()
+        for j in range(6):
+            if partition[j] <= roll < partition[j + 1]:
+                outcome[j] += 1
+    return outcome
+
+
+def benchmark_dice_sampler(rolls=1_000_000, dice_counts=(1, 10, 100)):
+    partition = [0, *cl.np.cumsum(SKEWED_DIE)]
+    scanned_rolls = 10_000  # the scan is far too slow for the full count, time a sample and scale it up
+    print(f"{'dice':>6} {'scan (ms)':>16} {'sampler (ms)':>16}   for {rolls:,} rolls")
+    for n in dice_counts:
+        scan = best_time(lambda: [partition_scan_roll(partition, n) for _ in range(scanned_rolls)], repeat=1)
+        sampler = cl.DiceSampler(SKEWED_DIE, n)
+        faces = cl.np.empty((rolls, n), dtype=cl.np.uint8)
+        sums = cl.np.empty(rolls, dtype=cl.np.int64)
+        batch = best_time(lambda: sampler.sample(faces, sums), repeat=3)
+        print(f'{n:>6} {scan * rolls / scanned_rolls:>16.1f} {batch:>16.1f}')
+
+
+def benchmark_alias_table(draws=1_000_000, category_counts=(6, 600, 60_000)):
+    """
+    One draw per category count, by the partition scan, a searchsorted on the CDF and the alias table.
+    The categories are a random distribution, standing in for a die (6) or a convolution (600, 60,000).
+    """
+    rng = cl.np.random.default_rng(0)
+    scanned_draws = 1_000
+    print(f"{'categories':>10} {'scan (ms)':>16} {'searchsorted (ms)':>18} {'alias (ms)':>16} {'alias build (ms)':>18}"
+          f"   for {draws:,} draws")
+    for k in category_counts:
+        weights = rng.random(k)
+        weights /= weights.sum()
+        partition = [0, *cl.np.cumsum(weights)]
+
+        def scan():
+            for _ in range(scanned_draws):
+                u = random.random()
+                for j in range(k):
+                    if partition[j] <= u < partition[j + 1]:
+                        break
+
+        cdf = cl.np.cumsum(weights)
+        scan_time = best_time(scan, repeat=1) * draws / scanned_draws
+        searchsorted = best_time(lambda: cl.np.searchsorted(cdf, rng.random(draws), side='right'), repeat=3)
+        build = best_time(lambda: cl.AliasTable(weights, rng), repeat=3)
+        table = cl.AliasTable(weights, rng)
+        alias = best_time(lambda: table.draw(draws), repeat=3)
+        print(f'{k:>10} {scan_time:>16.1f} {searchsorted:>18.1f} {alias:>16.1f} {build:>18.2f}')
+
+
+class DictRoll:
+    """
+    The per-roll object every simulation used to keep: the attributes of the old `Roll`, in an instance __dict__.
+    """
+    def __init__(self, sim, roll_number, faces, previous_roll, frequency, box_size=(17, 50.6)):
+        self.sim = sim
+        self.roll_number = roll_number
+        self.box_width, self.box_height = box_size
+        self.graph = None
+        self.dice = len(faces)
+        self.prev_roll = previous_roll
+        self.faces = faces.tolist()
+        self.face_counts = cl.np.bincount(faces, minlength=7)[1:].tolist()
+        self.sum = sum(self.faces)
+        self.frequency = frequency
+        self.px_coord = (self.sum * self.box_width, (frequency - 1) * self.box_height)
+        self.hitbox = ((self.px_coord[0], self.px_coord[1] + self.box_height), (self.px_coord[0] + self.box_width, self.px_coord[1]))
+        self.id = roll_number
+
+
+def traced_bytes(build):
+    """
+    Bytes still allocated once `build()` returns, as long as its result is alive.
+    """
+    tracemalloc.start()
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def benchmark_roll_memory(rolls=100_000, dice=10):
+    faces = cl.DiceSampler(SKEWED_DIE, dice, seed=0).roll(rolls)[0]
+    sums = faces.sum(axis=1, dtype=cl.np.int64)
+
+    def dict_rolls():
+        # the old layout: a list of every roll, and the same rolls again in a dictionary keyed by sum
+        roll_list, bin_dictionary, counter = [], {}, {}
+        previous = None
+        for i in range(rolls):
+            roll_sum = int(sums[i])
+            counter[roll_sum] = counter.get(roll_sum, 0) + 1
+            previous = DictRoll(None, i + 1, faces[i], previous, counter[roll_sum])
+            roll_list.append(previous)
+            bin_dictionary.setdefault(roll_sum, []).append(previous)
+        for roll in roll_list:
+            roll.prev_roll = None  # break the chain so that freeing the list is not one deep recursion
+        return roll_list, bin_dictionary
+
+    def roll_store():
+        store = cl.RollStore(rolls, dice)
+        for i in range(rolls):
+            store.append(int(sums[i]), 1, faces=faces[i])
+        return store
+
+    before = traced_bytes(dict_rolls) / rolls
+    after = traced_bytes(roll_store) / rolls
+    dict_roll = DictRoll(None, 1, faces[0], None, 1)
+    dict_view = sys.getsizeof(dict_roll) + sys.getsizeof(dict_roll.__dict__)
+    slots_view = sys.getsizeof(cl.Roll(None, 0))
+    print(f'{rolls:,} rolls of {dice} dice, bytes per roll')
+    print(f"{'Roll objects (before)':>28} {before:>10.1f}")
+    print(f"{'RollStore (after)':>28} {after:>10.1f}")
+    print(f"{'one Roll, __dict__':>28} {dict_view:>10}   (object and its __dict__, without the values)")
+    print(f"{'one Roll view, __slots__':>28} {slots_view:>10}")
+
+
+if __name__ == '__main__':
+    benchmark_convolution_methods()
+    print()
+    benchmark_dice_sampler()
+    print()
+    benchmark_alias_table()
+    print()
+    benchmark_roll_memory()